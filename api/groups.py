@@ -1,46 +1,35 @@
 import asyncio
+from collections.abc import AsyncGenerator
 
+from core.cache import Resource, cached_pages
 from core.client import get_client
+from core.paginator import Params, TotalCount, paginate
 from core.progress import add_task, update_task
 from core.settings import get_settings
+from core.tracing import span
 from models.group import Group
 
 SETTINGS = get_settings()
 
 
-async def list_groups(filters: list[str]) -> list[Group]:
-    endpoint = "/v2/usergroups"
-    base_params: list[tuple[str, str | int | float | None]] = [
-        ("limit", SETTINGS.limit)
-    ]
-    [base_params.append(("filter", f)) for f in filters]
-    first_params = [*base_params, ("skip", 0)]
-    response = await get_client().get(endpoint, params=first_params)
-    response.raise_for_status()
-    body = response.json()
-    total = int(response.headers.get("x-total-count"))
-    groups = [Group(**result) for result in body]
-    if len(groups) == total:
-        return groups
-    task_id = add_task(
+async def iter_groups(
+    filters: list[str] | None = None,
+) -> AsyncGenerator[list[Group]]:
+    params: Params = [("limit", SETTINGS.limit)]
+    params.extend(("filter", f) for f in filters or [])
+    pages = paginate(
+        "/v2/usergroups",
+        params,
+        TotalCount.HEADER,
         "Fetching user groups from JumpCloud",
-        total=total,
-        completed=SETTINGS.limit,
     )
-    async with get_client() as client:
-        tasks = []
-        skip = SETTINGS.limit
-        while skip < total:
-            page_params = [*base_params, ("skip", skip)]
-            tasks.append(client.get(endpoint, params=page_params))
-            skip += SETTINGS.limit
-        for task in asyncio.as_completed(tasks):
-            response = await task
-            response.raise_for_status()
-            body = response.json()
-            groups.extend(Group(**result) for result in body)
-            update_task(task_id, advance=len(body))
-    return groups
+    pages = cached_pages(Resource.GROUPS, pages, filters=filters)
+    async for page in pages:
+        yield [Group(**result) for result in page]
+
+
+async def list_groups(filters: list[str]) -> list[Group]:
+    return [group async for page in iter_groups(filters) for group in page]
 
 
 async def get_group(group_id: str) -> Group:
@@ -51,35 +40,13 @@ async def get_group(group_id: str) -> Group:
 
 
 async def get_group_members(group_id: str) -> list[str]:
-    endpoint = f"/v2/usergroups/{group_id}/members"
-    base_params = {"limit": SETTINGS.limit}
-    first_params = {**base_params, "skip": 0}
-    response = await get_client().get(endpoint, params=first_params)
-    response.raise_for_status()
-    body = response.json()
-    total = int(response.headers.get("x-total-count"))
-    users = [result["to"]["id"] for result in body]
-    if len(users) == total:
-        return users
-    task_id = add_task(
+    pages = paginate(
+        f"/v2/usergroups/{group_id}/members",
+        [("limit", SETTINGS.limit)],
+        TotalCount.HEADER,
         "Fetching group members from JumpCloud",
-        total=total,
-        completed=SETTINGS.limit,
     )
-    async with get_client() as client:
-        tasks = []
-        skip = SETTINGS.limit
-        while skip < total:
-            page_params = {**base_params, "skip": skip}
-            tasks.append(client.get(endpoint, params=page_params))
-            skip += SETTINGS.limit
-        for task in asyncio.as_completed(tasks):
-            response = await task
-            response.raise_for_status()
-            body = response.json()
-            users.extend(result["to"]["id"] for result in body)
-            update_task(task_id, advance=len(body))
-    return users
+    return [result["to"]["id"] async for page in pages for result in page]
 
 
 async def get_groups_members(group_ids: list[str]) -> list[str]:
@@ -103,8 +70,10 @@ async def add_group_member(group_id: str, user_id: str) -> None:
         "type": "user",
         "id": user_id,
     }
-    response = await get_client().post(endpoint, json=data)
-    response.raise_for_status()
+    attributes = {"jam.group_id": group_id, "jam.user_id": user_id}
+    with span("add group member", **attributes):
+        response = await get_client().post(endpoint, json=data)
+        response.raise_for_status()
 
 
 async def remove_group_member(group_id: str, user_id: str) -> None:
@@ -114,5 +83,7 @@ async def remove_group_member(group_id: str, user_id: str) -> None:
         "type": "user",
         "id": user_id,
     }
-    response = await get_client().post(endpoint, json=data)
-    response.raise_for_status()
+    attributes = {"jam.group_id": group_id, "jam.user_id": user_id}
+    with span("remove group member", **attributes):
+        response = await get_client().post(endpoint, json=data)
+        response.raise_for_status()
@@ -1,48 +1,118 @@
 import asyncio
+from collections.abc import AsyncGenerator
 
+from core.cache import DeltaSpec, Resource, cached_pages
 from core.client import get_client
+from core.paginator import Page, Params, TotalCount, paginate
 from core.progress import add_task, update_task
+from core.query import in_filters
+from core.retry import SAFE_TO_RETRY
 from core.settings import get_settings
+from models.columns import Columns
+from models.projection import project_ids, project_page
 from models.system import Association, System
 
 SETTINGS = get_settings()
+DELTA = DeltaSpec(endpoint="/systems", watermarks=("created", "lastContact"))
 
 
-async def list_systems(filters: list[str] | None = None) -> list[System]:
-    endpoint = "/systems"
-    base_params = {
-        "limit": SETTINGS.limit,
-        "sort": "_id",
-    }
-    for i, f in enumerate(filters or []):
-        base_params[f"filter[{i}]"] = f
-    first_params = {**base_params, "skip": 0}
-    response = await get_client().get(endpoint, params=first_params)
-    response.raise_for_status()
-    body = response.json()
-    total = body.get("totalCount", 0)
-    systems = [System(**result) for result in body.get("results")]
-    if len(systems) == total:
-        return systems
-    task_id = add_task(
+def _list_params(
+    filters: list[str] | None,
+    fields: list[str] | None = None,
+) -> Params:
+    params: Params = [("limit", SETTINGS.limit), ("sort", "_id")]
+    params.extend((f"filter[{i}]", f) for i, f in enumerate(filters or []))
+    if fields:
+        params.append(("fields", " ".join(fields)))
+    return params
+
+
+def _listing(
+    filters: list[str] | None,
+    fields: list[str] | None = None,
+) -> AsyncGenerator[Page]:
+    return paginate(
+        DELTA.endpoint,
+        _list_params(filters, fields),
+        TotalCount.BODY,
         "Fetching systems from JumpCloud",
-        total=total,
-        completed=SETTINGS.limit,
     )
-    async with get_client() as client:
-        tasks = []
-        skip = SETTINGS.limit
-        while skip < total:
-            page_params = {**base_params, "skip": skip}
-            tasks.append(client.get(endpoint, params=page_params))
-            skip += SETTINGS.limit
-        for task in asyncio.as_completed(tasks):
-            response = await task
-            response.raise_for_status()
-            results = response.json().get("results")
-            systems.extend([System(**result) for result in results])
-            update_task(task_id, advance=len(systems))
-    return systems
+
+
+def _cached_listing(
+    filters: list[str] | None,
+    fields: list[str] | None,
+) -> AsyncGenerator[Page]:
+    return cached_pages(
+        Resource.SYSTEMS,
+        _listing(filters),
+        DELTA,
+        filters,
+        _listing(filters, fields) if fields else None,
+    )
+
+
+async def iter_systems(
+    filters: list[str] | None = None,
+    fields: list[str] | None = None,
+) -> AsyncGenerator[list[System]]:
+    """
+    Yield pages of systems, from the cache when it is fresh.
+
+    Args:
+        filters: Filters in JumpCloud's filter syntax.
+        fields: The API fields to fetch and validate, e.g. from
+            `api_fields`. All of them are fetched when this is None.
+
+    Yields:
+        Pages of systems. With `fields`, other attributes are left unset.
+    """
+    async for page in _cached_listing(filters, fields):
+        yield project_page(System, page, fields)
+
+
+async def iter_system_ids(
+    filters: list[str] | None = None,
+) -> AsyncGenerator[list[str]]:
+    """
+    Yield pages of system IDs, from the cache when it is fresh.
+
+    Only the ID is fetched, and no models are built for it.
+    """
+    fields = ["_id"]
+    async for page in _cached_listing(filters, fields):
+        yield project_ids(System, page)
+
+
+async def list_systems(
+    filters: list[str] | None = None,
+    fields: list[str] | None = None,
+) -> list[System]:
+    return [
+        system
+        async for page in iter_systems(filters, fields)
+        for system in page
+    ]
+
+
+async def tabulate_systems(
+    filters: list[str] | None,
+    fields: list[str],
+) -> Columns[System]:
+    """
+    List systems into a compact column store instead of models.
+
+    Args:
+        filters: Filters in JumpCloud's filter syntax.
+        fields: The API fields to keep, e.g. from `api_fields`.
+
+    Returns:
+        The systems, holding only `fields`.
+    """
+    columns = Columns(System, fields)
+    async for page in _cached_listing(filters, fields):
+        columns.extend(page)
+    return columns
 
 
 async def get_system(system_id: str) -> System:
@@ -52,18 +122,48 @@ async def get_system(system_id: str) -> System:
     return System(**response.json())
 
 
-async def get_systems(system_ids: list[str]) -> list[System]:
+async def get_systems(
+    system_ids: list[str],
+    fields: list[str] | None = None,
+) -> list[System]:
+    """
+    Fetch systems by ID, batching up to `limit` IDs into each request.
+
+    The cache is bypassed so the records are always current.
+
+    Args:
+        system_ids: The IDs to fetch.
+        fields: The API fields to fetch, or None for all of them.
+
+    Returns:
+        The systems found, in the order their IDs were given. IDs that do not
+        exist are left out.
+    """
+    id_filters = in_filters(
+        "_id", list(dict.fromkeys(system_ids)), SETTINGS.limit
+    )
     task_id = add_task(
         f"Fetching {len(system_ids)} systems from JumpCloud",
-        total=len(system_ids),
+        total=len(id_filters),
     )
-    tasks = [get_system(system_id) for system_id in system_ids]
-    systems: list[System] = []
-    for task in asyncio.as_completed(tasks):
-        system = await task
-        systems.append(system)
-        update_task(task_id, advance=len(system_ids))
-    return systems
+
+    async def fetch(id_filter: str) -> list[System]:
+        pages = _listing([id_filter], fields)
+        batch = [
+            model
+            async for page in pages
+            for model in project_page(System, page, fields)
+        ]
+        update_task(task_id, advance=1)
+        return batch
+
+    batches = await asyncio.gather(*(fetch(f) for f in id_filters))
+    system_dict = {system.id: system for batch in batches for system in batch}
+    return [
+        system_dict[system_id]
+        for system_id in system_ids
+        if system_id in system_dict
+    ]
 
 
 async def get_fde_key(system_id: str) -> str:
@@ -81,7 +181,11 @@ async def find_system(query: str) -> list[System]:
             "fields": ["hostname", "serialNumber"],
         },
     }
-    response = await get_client().post(endpoint, json=data)
+    response = await get_client().post(
+        endpoint,
+        json=data,
+        extensions=SAFE_TO_RETRY,
+    )
     response.raise_for_status()
     body = response.json()
     return [System(**result) for result in body.get("results")]
@@ -1,43 +1,156 @@
 import asyncio
+from collections.abc import AsyncGenerator
 
+from core.cache import DeltaSpec, Resource, cached_pages, directory_size
 from core.client import get_client
+from core.paginator import Page, Params, TotalCount, paginate
 from core.progress import add_task, update_task
+from core.query import in_filters
+from core.retry import SAFE_TO_RETRY
 from core.settings import get_settings
+from models.columns import Columns
+from models.projection import project_ids, project_page
 from models.user import MFA, User
 
 SETTINGS = get_settings()
+# Users have no modification time, so edits to other fields are only seen
+# by a full listing, which is made whenever the snapshot goes stale.
+DELTA = DeltaSpec(
+    endpoint="/systemusers",
+    watermarks=("created", "password_date"),
+    full_sync_interval=SETTINGS.cache_ttl.get(Resource.USERS, 0),
+)
+
+
+def _list_params(
+    filters: list[str] | None,
+    fields: list[str] | None = None,
+) -> Params:
+    params: Params = [("limit", SETTINGS.limit), ("sort", "_id")]
+    params.extend((f"filter[{i}]", f) for i, f in enumerate(filters or []))
+    if fields:
+        params.append(("fields", " ".join(fields)))
+    return params
+
+
+def _listing(
+    filters: list[str] | None,
+    fields: list[str] | None = None,
+) -> AsyncGenerator[Page]:
+    return paginate(
+        DELTA.endpoint,
+        _list_params(filters, fields),
+        TotalCount.BODY,
+        "Fetching users from JumpCloud",
+    )
 
 
-async def list_users(filters: list[str] | None = None) -> list[User]:
-    endpoint = "/systemusers"
-    base_params = {"limit": SETTINGS.limit, "sort": "_id"}
-    for i, f in enumerate(filters or []):
-        base_params[f"filter[{i}]"] = f
-    first_params = {**base_params, "skip": 0}
-    response = await get_client().get(endpoint, params=first_params)
-    response.raise_for_status()
-    body = response.json()
-    total = body.get("totalCount", 0)
-    users = [User(**result) for result in body.get("results")]
-    if len(users) == total:
-        return users
-    task_id = add_task(
-        "Fetching users from JumpCloud", total=total, completed=SETTINGS.limit
+def _cached_listing(
+    filters: list[str] | None,
+    fields: list[str] | None,
+) -> AsyncGenerator[Page]:
+    return cached_pages(
+        Resource.USERS,
+        _listing(filters),
+        DELTA,
+        filters,
+        _listing(filters, fields) if fields else None,
     )
-    async with get_client() as client:
-        tasks = []
-        skip = SETTINGS.limit
-        while skip < total:
-            page_params = {**base_params, "skip": skip}
-            tasks.append(client.get(endpoint, params=page_params))
-            skip += SETTINGS.limit
-        for task in asyncio.as_completed(tasks):
-            response = await task
-            response.raise_for_status()
-            results = response.json().get("results")
-            users.extend(User(**result) for result in results)
-            update_task(task_id, advance=len(results))
-    return users
+
+
+async def iter_users(
+    filters: list[str] | None = None,
+    fields: list[str] | None = None,
+) -> AsyncGenerator[list[User]]:
+    """
+    Yield pages of users, from the cache when it is fresh.
+
+    Args:
+        filters: Filters in JumpCloud's filter syntax.
+        fields: The API fields to fetch and validate, e.g. from
+            `api_fields`. All of them are fetched when this is None.
+
+    Yields:
+        Pages of users. With `fields`, other attributes are left unset.
+    """
+    async for page in _cached_listing(filters, fields):
+        yield project_page(User, page, fields)
+
+
+async def iter_user_ids(
+    filters: list[str] | None = None,
+) -> AsyncGenerator[list[str]]:
+    """
+    Yield pages of user IDs, from the cache when it is fresh.
+
+    Only the ID is fetched, and no models are built for it.
+    """
+    fields = ["_id"]
+    async for page in _cached_listing(filters, fields):
+        yield project_ids(User, page)
+
+
+async def list_users(
+    filters: list[str] | None = None,
+    fields: list[str] | None = None,
+) -> list[User]:
+    return [
+        user async for page in iter_users(filters, fields) for user in page
+    ]
+
+
+async def tabulate_users(
+    filters: list[str] | None,
+    fields: list[str],
+) -> Columns[User]:
+    """
+    List users into a compact column store instead of models.
+
+    Args:
+        filters: Filters in JumpCloud's filter syntax.
+        fields: The API fields to keep, e.g. from `api_fields`.
+
+    Returns:
+        The users, holding only `fields`.
+    """
+    columns = Columns(User, fields)
+    async for page in _cached_listing(filters, fields):
+        columns.extend(page)
+    return columns
+
+
+async def lookup_users(
+    user_ids: list[str],
+    fields: list[str] | None = None,
+) -> list[User]:
+    """
+    Fetch the users with the given IDs in as few requests as possible.
+
+    IDs are matched with batched `_id:$in:` filters, which a fresh cache
+    answers locally. When the IDs cover more than `full_listing_threshold`
+    of the tenant, one full listing is cheaper and is used instead.
+
+    Args:
+        user_ids: The IDs to look up. Duplicates are ignored.
+        fields: The API fields to fetch, or None for all of them.
+
+    Returns:
+        The users found, in the order their IDs were first given.
+    """
+    ids = list(dict.fromkeys(user_ids))
+    if not ids:
+        return []
+    size = await directory_size(Resource.USERS, DELTA.endpoint)
+    if len(ids) >= size * SETTINGS.full_listing_threshold:
+        users = await list_users(fields=fields)
+    else:
+        id_filters = in_filters("_id", ids, SETTINGS.limit)
+        batches = await asyncio.gather(
+            *(list_users([f], fields) for f in id_filters),
+        )
+        users = [user for batch in batches for user in batch]
+    user_dict = {user.id: user for user in users}
+    return [user_dict[user_id] for user_id in ids if user_id in user_dict]
 
 
 async def get_user(user_id: str) -> User:
@@ -47,17 +160,44 @@ async def get_user(user_id: str) -> User:
     return User(**response.json())
 
 
-async def get_users(user_ids: list[str]) -> list[User]:
+async def get_users(
+    user_ids: list[str],
+    fields: list[str] | None = None,
+) -> list[User]:
+    """
+    Fetch users by ID, batching up to `limit` IDs into each request.
+
+    The cache is bypassed so the records are always current.
+
+    Args:
+        user_ids: The IDs to fetch.
+        fields: The API fields to fetch, or None for all of them.
+
+    Returns:
+        The users found, in the order their IDs were given. IDs that do not
+        exist are left out.
+    """
+    id_filters = in_filters(
+        "_id", list(dict.fromkeys(user_ids)), SETTINGS.limit
+    )
     task_id = add_task(
-        f"Fetching {len(user_ids)} users from JumpCloud", total=len(user_ids)
+        f"Fetching {len(user_ids)} users from JumpCloud",
+        total=len(id_filters),
     )
-    tasks = [get_user(user_id) for user_id in user_ids]
-    users: list[User] = []
-    for task in asyncio.as_completed(tasks):
-        user = await task
-        users.append(user)
+
+    async def fetch(id_filter: str) -> list[User]:
+        pages = _listing([id_filter], fields)
+        batch = [
+            model
+            async for page in pages
+            for model in project_page(User, page, fields)
+        ]
         update_task(task_id, advance=1)
-    return users
+        return batch
+
+    batches = await asyncio.gather(*(fetch(f) for f in id_filters))
+    user_dict = {user.id: user for batch in batches for user in batch}
+    return [user_dict[user_id] for user_id in user_ids if user_id in user_dict]
 
 
 async def update_user(user: User) -> User:
@@ -138,7 +278,11 @@ async def find_user(email: str) -> list[User]:
             "fields": ["email"],
         },
     }
-    response = await get_client().post(endpoint, json=data)
+    response = await get_client().post(
+        endpoint,
+        json=data,
+        extensions=SAFE_TO_RETRY,
+    )
     response.raise_for_status()
     body = response.json()
     return [User(**result) for result in body.get("results")]
@@ -0,0 +1,198 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.scenarios import SCENARIOS
+
+PROJECT_ROOT = Path(__file__).parent.parent
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+# Lower is better for each of these; they are compared with the baseline.
+COMPARED = ("wall_seconds", "peak_rss_bytes", "alloc_bytes_per_record")
+
+type Results = dict[str, dict[str, dict[str, Any]]]
+
+app = typer.Typer(add_completion=False)
+
+
+def _run_worker(scenario: str, size: int, allocations: bool) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="jam-bench-") as config:
+        config_path = Path(config)
+        result_file = config_path / "result.json"
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.worker",
+            scenario,
+            str(size),
+            str(result_file),
+        ]
+        if allocations:
+            command.append("--allocations")
+        process = subprocess.run(
+            command,
+            cwd=PROJECT_ROOT,
+            env={
+                **os.environ,
+                "JAM_CONFIG_PATH": config,
+                "JAM_NO_DAEMON": "1",
+            },
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if process.returncode:
+            err = f"{scenario} ({size}) failed:\n{process.stderr}"
+            raise RuntimeError(err)
+        return json.loads(result_file.read_text())
+
+
+def _change(value: float, base: float | None) -> str:
+    if not base:
+        return "-"
+    change = (value - base) / base
+    return f"{change:+.0%}"
+
+
+def _regressions(
+    results: Results,
+    baseline: Results,
+    tolerance: float,
+) -> list[str]:
+    regressions = []
+    for scenario, sizes in results.items():
+        for size, metrics in sizes.items():
+            base = baseline.get(scenario, {}).get(size, {})
+            for metric in COMPARED:
+                old, new = base.get(metric), metrics.get(metric)
+                if old and new and new > old * (1 + tolerance):
+                    regressions.append(
+                        f"{scenario} ({size}): {metric} "
+                        f"{_change(new, old)} over the baseline",
+                    )
+    return regressions
+
+
+def _allocations(metrics: dict[str, Any]) -> str:
+    if "alloc_bytes_per_record" not in metrics:
+        return "-"
+    return f"{metrics['alloc_bytes_per_record']:.0f}"
+
+
+def _table(results: Results, baseline: Results) -> Table:
+    table = Table(title="jam benchmarks")
+    for column in (
+        "Scenario",
+        "Size",
+        "Wall (s)",
+        "Req/s",
+        "Peak RSS (MB)",
+        "Alloc/record (B)",
+        "Δ wall",
+        "Δ RSS",
+        "Δ alloc",
+    ):
+        table.add_column(
+            column, justify="left" if column == "Scenario" else "right"
+        )
+    for scenario, sizes in results.items():
+        for size, m in sizes.items():
+            base = baseline.get(scenario, {}).get(size, {})
+            table.add_row(
+                scenario,
+                size,
+                f"{m['wall_seconds']:.2f}",
+                f"{m['requests_per_second']:.0f}",
+                f"{m['peak_rss_bytes'] / 2**20:.0f}",
+                _allocations(m),
+                *(
+                    _change(m[metric], base.get(metric))
+                    if metric in m
+                    else "-"
+                    for metric in COMPARED
+                ),
+            )
+    return table
+
+
+@app.command()
+def main(
+    sizes: list[int] = typer.Option(
+        DEFAULT_SIZES,
+        "--size",
+        help="Tenant sizes, in users and systems each. Repeat for several.",
+    ),
+    scenarios: list[str] = typer.Option(
+        list(SCENARIOS),
+        "--scenario",
+        help=f"Scenarios to run. Repeat for several: {', '.join(SCENARIOS)}.",
+    ),
+    *,
+    baseline_file: Path = typer.Option(
+        BASELINE_FILE,
+        "--baseline",
+        help="The stored results to compare against.",
+    ),
+    save_baseline: bool = typer.Option(
+        False,
+        "--save-baseline",
+        help="Store these results as the new baseline.",
+    ),
+    tolerance: float = typer.Option(
+        0.25,
+        "--tolerance",
+        help="How much worse than the baseline a metric may be before it "
+        "counts as a regression.",
+    ),
+    allocations: bool = typer.Option(
+        True,
+        "--allocations/--no-allocations",
+        help="Also trace allocations, in a second run of each scenario.",
+    ),
+) -> None:
+    """
+Benchmark jam against a simulated JumpCloud tenant. Each scenario runs the \
+real api functions or CLI commands in a fresh process for each tenant size \
+and reports wall time, requests per second, peak RSS and peak traced \
+allocations per record, compared with the stored baseline. Exits with 1 if \
+any of them regressed by more than the tolerance.
+    """
+    console = Console()
+    baseline: Results = {}
+    if baseline_file.exists():
+        baseline = json.loads(baseline_file.read_text())
+    results: Results = {}
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            err = f"Unknown scenario: {scenario}"
+            raise typer.BadParameter(err)
+        for size in sizes:
+            console.print(f"[dim]Running {scenario} ({size})...[/dim]")
+            metrics = _run_worker(scenario, size, allocations=False)
+            if allocations:
+                metrics |= _run_worker(scenario, size, allocations=True)
+            results.setdefault(scenario, {})[str(size)] = metrics
+    console.print(_table(results, baseline))
+    if save_baseline:
+        for scenario, sizes_run in results.items():
+            baseline.setdefault(scenario, {}).update(sizes_run)
+        baseline_file.write_text(json.dumps(baseline, indent=2) + "\n")
+        console.print(f"[green]Baseline saved to {baseline_file}[/green]")
+        return
+    regressions = _regressions(results, baseline, tolerance)
+    for regression in regressions:
+        console.print(f"[red]{regression}[/red]")
+    if regressions:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
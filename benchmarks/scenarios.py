@@ -0,0 +1,97 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import NamedTuple
+
+from core.simulator import GROUP_PREFIX, USER_PREFIX, Tenant, object_id
+
+# jam's api and cli modules are imported inside each scenario: importing
+# them loads jam's settings, which only the worker process has set up.
+
+type Runner = Callable[[Tenant, Path], int]
+
+
+class Scenario(NamedTuple):
+    description: str
+    # Runs the scenario in an open client session and returns how many
+    # records it processed.
+    run: Runner
+
+
+def _command(argv: list[str]) -> None:
+    from cli.app import run_command  # noqa: PLC0415
+
+    code = run_command(argv)
+    if code:
+        err = f"'jam {' '.join(argv)}' exited with {code}"
+        raise RuntimeError(err)
+
+
+def list_users(tenant: Tenant, _: Path) -> int:
+    from api import users as usr_api  # noqa: PLC0415
+    from core.client import run  # noqa: PLC0415
+
+    run(usr_api.list_users())
+    return tenant.users
+
+
+def list_systems(tenant: Tenant, _: Path) -> int:
+    from api import systems as sys_api  # noqa: PLC0415
+    from core.client import run  # noqa: PLC0415
+
+    run(sys_api.list_systems())
+    return tenant.systems
+
+
+def get_groups_members(tenant: Tenant, _: Path) -> int:
+    from api import groups as grp_api  # noqa: PLC0415
+    from core.client import run  # noqa: PLC0415
+
+    group_ids = [object_id(GROUP_PREFIX, i) for i in range(tenant.groups)]
+    return len(run(grp_api.get_groups_members(group_ids)))
+
+
+def user_list(tenant: Tenant, _: Path) -> int:
+    _command(["user", "list"])
+    return tenant.users
+
+
+def system_list_csv(tenant: Tenant, workdir: Path) -> int:
+    _command(["system", "list", "--csv", str(workdir / "systems.csv")])
+    return tenant.systems
+
+
+def group_member_add(tenant: Tenant, workdir: Path) -> int:
+    user_csv = workdir / "users.csv"
+    user_ids = (
+        object_id(USER_PREFIX, i) for i in range(min(100, tenant.users))
+    )
+    user_csv.write_text("\n".join(user_ids))
+    _command(
+        [
+            "group",
+            "member",
+            "add",
+            "--group-id",
+            object_id(GROUP_PREFIX, 0),
+            "--user-csv",
+            str(user_csv),
+        ],
+    )
+    # Adding the users first lists every user and group.
+    return tenant.users + tenant.groups
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "list_users": Scenario("api: list_users()", list_users),
+    "list_systems": Scenario("api: list_systems()", list_systems),
+    "get_groups_members": Scenario(
+        "api: get_groups_members() for every group", get_groups_members
+    ),
+    "user_list": Scenario("cli: jam user list, piped", user_list),
+    "system_list_csv": Scenario(
+        "cli: jam system list --csv, piped", system_list_csv
+    ),
+    "group_member_add": Scenario(
+        "cli: jam group member add, 100 users from CSV", group_member_add
+    ),
+}
@@ -0,0 +1,69 @@
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import typer
+
+from benchmarks.scenarios import SCENARIOS
+from core.cache import CacheMode, set_cache_mode
+from core.memprofile import peak_rss
+from core.simulator import Tenant, simulated_session
+
+app = typer.Typer(add_completion=False)
+
+
+@app.command()
+def main(
+    scenario: str,
+    size: int,
+    result_file: Path,
+    allocations: bool = typer.Option(
+        False,
+        "--allocations",
+        help="Trace allocations instead of timing the run.",
+    ),
+) -> None:
+    """
+    Run one scenario against a simulated tenant and write its measurements
+    to RESULT_FILE. Started by `python -m benchmarks`, once per scenario and
+    tenant size, so that peak RSS is measured in a fresh process.
+    """
+    tenant = Tenant.of_size(size)
+    workdir = Path(os.environ["JAM_CONFIG_PATH"])
+    # Every run goes to the (simulated) API rather than a warm cache.
+    set_cache_mode(CacheMode.OFF)
+    # Command output is discarded; prompts are answered yes.
+    sys.stdin = io.StringIO("y\n")
+    with (
+        Path(os.devnull).open("w") as devnull,
+        redirect_stdout(devnull),
+        simulated_session(tenant) as network,
+    ):
+        if allocations:
+            tracemalloc.start()
+        start = time.perf_counter()
+        records = SCENARIOS[scenario].run(tenant, workdir)
+        wall = time.perf_counter() - start
+    if allocations:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result = {"alloc_bytes_per_record": peak / max(records, 1)}
+    else:
+        result = {
+            "records": records,
+            "wall_seconds": wall,
+            "requests": network.requests,
+            "requests_per_second": network.requests / wall,
+            "response_bytes": network.response_bytes,
+            "peak_rss_bytes": peak_rss(),
+        }
+    result_file.write_text(json.dumps(result))
+
+
+if __name__ == "__main__":
+    app()
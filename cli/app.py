@@ -0,0 +1,280 @@
+import importlib
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import typer
+from rich.console import Console
+from typer.core import TyperGroup
+
+
+class CommandGroup(NamedTuple):
+    module: str
+    help: str
+    # Whether the group talks to JumpCloud and needs a client session.
+    api: bool = True
+
+
+# Loaded only when invoked, so `jam --help` and `jam config` stay fast.
+COMMAND_GROUPS: dict[str, CommandGroup] = {
+    "application": CommandGroup(
+        "cli.application.commands",
+        "Manage JumpCloud SSO applications",
+    ),
+    "cache": CommandGroup(
+        "cli.cache.commands",
+        "Manage the local directory cache",
+    ),
+    "config": CommandGroup(
+        "cli.config",
+        "Manage jam configuration",
+        api=False,
+    ),
+    "dev": CommandGroup(
+        "cli.dev",
+        "Tools for developing and load-testing jam",
+        api=False,
+    ),
+    "group": CommandGroup(
+        "cli.group.commands",
+        "Manage JumpCloud user groups",
+    ),
+    "serve": CommandGroup(
+        "cli.serve",
+        "Run a background daemon that keeps jam warm between commands",
+        api=False,
+    ),
+    "shell": CommandGroup(
+        "cli.shell",
+        "Run jam commands interactively in one warm session",
+        api=False,
+    ),
+    "system": CommandGroup(
+        "cli.system.commands",
+        "Manage JumpCloud systems",
+    ),
+    "user": CommandGroup(
+        "cli.user.commands",
+        "Manage JumpCloud system users",
+    ),
+}
+
+
+# Where LazyGroup leaves the command line it resolved, in the context's meta.
+COMMAND_KEY = "jam.command"
+ARGV_KEY = "jam.argv"
+
+
+class LazyGroup(TyperGroup):
+    """
+    Imports a command group's module only when that group is invoked.
+
+    Until then the group is a placeholder carrying its help text from
+    COMMAND_GROUPS, which is all `jam --help` needs.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:  # noqa: ANN401
+        super().__init__(**kwargs)
+        for name, group in COMMAND_GROUPS.items():
+            self.add_command(TyperGroup(name=name, help=group.help))
+        self._loaded: set[str] = set()
+
+    def resolve_command(
+        self,
+        ctx: typer.Context,
+        args: list[str],
+    ) -> tuple[Any, ...]:
+        name = args[0] if args else ""
+        if name in COMMAND_GROUPS and name not in self._loaded:
+            module = importlib.import_module(COMMAND_GROUPS[name].module)
+            command = typer.main.get_group(module.app)
+            self.add_command(command, name)
+            self._loaded.add(name)
+        resolved = super().resolve_command(ctx, args)
+        # Named in traces, e.g. "group member add", without its arguments.
+        ctx.meta.setdefault(COMMAND_KEY, _command_path(resolved[1], args))
+        ctx.meta.setdefault(ARGV_KEY, list(args))
+        return resolved
+
+
+def _command_path(command: Any, args: list[str]) -> list[str]:  # noqa: ANN401
+    path = args[:1]
+    for word in args[1:]:
+        command = getattr(command, "commands", {}).get(word)
+        if command is None:
+            break
+        path.append(word)
+    return path
+
+
+def _reject_session_options(ctx: typer.Context) -> None:
+    # The root options configure the client session, which groups that do
+    # not call JumpCloud never open, so they would be silently ignored.
+    group = f"'jam {ctx.invoked_subcommand}'"
+    for param in ctx.command.params:
+        if ctx.params.get(param.name or "") != param.default:
+            err = f"Only applies to commands that call JumpCloud, not {group}."
+            raise typer.BadParameter(err, ctx=ctx, param=param)
+
+
+def _timings_report(
+    summary: bool,
+    json_file: Path | None,
+) -> Callable[[], None]:
+    from core.settings import get_settings  # noqa: PLC0415
+    from core.timings import start_timings  # noqa: PLC0415
+
+    timings = start_timings()
+    working_dir = get_settings().JAM_WORKING_DIR
+
+    def report() -> None:
+        if summary:
+            timings.print_summary()
+        if json_file:
+            timings.write_json(working_dir / json_file)
+
+    return report
+
+
+def _start_profile(ctx: typer.Context, profile_file: Path) -> None:
+    from core.profiling import Profiler  # noqa: PLC0415
+    from core.settings import get_settings  # noqa: PLC0415
+
+    profiler = Profiler()
+    path = get_settings().JAM_WORKING_DIR / profile_file
+
+    def report() -> None:
+        profiler.stop()
+        written = profiler.write(path)
+        Console(stderr=True).print(
+            f"[dim]Profile written to {', '.join(map(str, written))}[/dim]",
+        )
+
+    # Registered before everything else, so it stops last.
+    ctx.call_on_close(report)
+    profiler.start()
+
+
+def _start_memprofile(ctx: typer.Context) -> None:
+    from core.memprofile import start_memprofile  # noqa: PLC0415
+
+    profiler = start_memprofile()
+
+    def report() -> None:
+        profiler.stop()
+        profiler.print_report()
+
+    ctx.call_on_close(report)
+
+
+def _start_trace(ctx: typer.Context, trace_file: Path) -> None:
+    from core.settings import get_settings  # noqa: PLC0415
+    from core.tracing import span, start_tracing  # noqa: PLC0415
+
+    tracer = start_tracing()
+    path = get_settings().JAM_WORKING_DIR / trace_file
+    # Exported once the command's span, registered after, has ended.
+    ctx.call_on_close(lambda: tracer.export(path))
+    command = " ".join(["jam", *ctx.meta.get(COMMAND_KEY, [])])
+    argv = " ".join(ctx.meta.get(ARGV_KEY, []))
+    ctx.with_resource(span(command, **{"jam.argv": argv}))
+
+
+def create_app() -> typer.Typer:
+    app = typer.Typer(
+        cls=LazyGroup,
+        help="JumpCloud CLI - \
+        Manage JumpCloud resources from the command line",
+    )
+
+    @app.callback()
+    def open_session(
+        ctx: typer.Context,
+        *,
+        cache: bool | None = typer.Option(
+            None,
+            "--cache/--no-cache",
+            help="Serve directory lookups from the local cache when fresh. "
+            "Defaults to the 'cache_enabled' setting.",
+        ),
+        strict: bool = typer.Option(
+            False,
+            "--strict",
+            help="Fully validate every record JumpCloud returns, failing on "
+            "any that do not match jam's models.",
+        ),
+        timings: bool = typer.Option(
+            False,
+            "--timings",
+            help="Print request latencies, retries and queue waits, and the "
+            "time spent validating and rendering, to stderr.",
+        ),
+        timings_json: Path | None = typer.Option(
+            None,
+            "--timings-json",
+            help="Write the same timings, with every request, to this JSON "
+            "file.",
+        ),
+        trace: Path | None = typer.Option(
+            None,
+            "--trace",
+            help="Append trace spans for the command, its requests and its "
+            "phases to this JSONL file, in OTLP/JSON.",
+        ),
+        profile: Path | None = typer.Option(
+            None,
+            "--profile",
+            help="Profile the command, writing pstats to this file and "
+            "collapsed stacks for flame graphs to FILE.collapsed.",
+        ),
+        memprofile: bool = typer.Option(
+            False,
+            "--memprofile",
+            help="Trace memory allocations and print peak RSS, the top "
+            "allocation sites and bytes per record, to stderr.",
+        ),
+    ) -> None:
+        group = COMMAND_GROUPS.get(ctx.invoked_subcommand or "")
+        if group is not None and not group.api:
+            _reject_session_options(ctx)
+            return
+        if profile:
+            _start_profile(ctx, profile)
+        if memprofile:
+            _start_memprofile(ctx)
+        from core.cache import CacheMode, set_cache_mode  # noqa: PLC0415
+        from core.client import client_session  # noqa: PLC0415
+        from models.projection import set_strict  # noqa: PLC0415
+
+        set_strict(strict)
+        if cache is not None:
+            set_cache_mode(CacheMode.ON if cache else CacheMode.OFF)
+        if timings or timings_json:
+            # Registered first, so it reports after the session has closed.
+            ctx.call_on_close(_timings_report(timings, timings_json))
+        if trace:
+            _start_trace(ctx, trace)
+        # One pooled client per command, closed when the command finishes.
+        ctx.with_resource(client_session())
+
+    return app
+
+
+def run_command(argv: list[str]) -> int:
+    """
+    Run a jam command line in this process, as `jam serve` and `jam shell` do.
+
+    Returns:
+        The command's exit code.
+    """
+    try:
+        create_app()(args=argv, prog_name="jam")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        Console(stderr=True).print(f"[red]{e.code}[/red]")
+        return 1
+    except Exception:  # noqa: BLE001
+        Console(stderr=True).print_exception()
+        return 1
+    return 0
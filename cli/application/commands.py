@@ -1,16 +1,15 @@
-import asyncio
-
 import typer
 
 from api import applications as app_api
 from cli.application import presenter as app_presenter
 from cli.application.group.commands import app as group_app
-from cli.output import save_to_csv
+from cli.output import is_piped, save_to_csv, stream_models
+from core.client import run
 from core.progress import progress_context
 from core.settings import get_settings
 
 SETTINGS = get_settings()
-app = typer.Typer()
+app = typer.Typer(help="Manage JumpCloud SSO applications")
 
 app.add_typer(group_app, name="group")
 
@@ -69,7 +68,17 @@ JumpCloud's filter syntax.
     if inactive:
         filters.append("active:$eq:false")
     with progress_context():
-        apps = asyncio.run(app_api.list_applications(filters))
+        if is_piped():
+            run(
+                stream_models(
+                    app_api.iter_applications(filters),
+                    json,
+                    csv_file,
+                    SETTINGS.csv_app_fields,
+                ),
+            )
+            return
+        apps = run(app_api.list_applications(filters))
     app_presenter.print_applications(apps, json)
     if csv_file:
         save_to_csv(apps, csv_file, SETTINGS.csv_app_fields)
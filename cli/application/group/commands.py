@@ -7,6 +7,7 @@ from api import groups as grp_api
 from cli.group import presenter as grp_presenter
 from cli.input import resolve_argument
 from cli.output import save_to_csv
+from core.client import run
 from core.progress import progress_context
 from core.settings import get_settings
 from models.group import Group
@@ -44,7 +45,7 @@ def list_groups(
 
     app_id = resolve_argument(app_id, "Application ID")
     with progress_context():
-        group_list, group_dict = asyncio.run(fetch_data(app_id))
+        group_list, group_dict = run(fetch_data(app_id))
     groups = [group_dict[group] for group in group_list]
     grp_presenter.print_groups(groups, json)
     if csv_file:
@@ -0,0 +1,78 @@
+import asyncio
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import typer
+
+from api import applications as app_api
+from api import groups as grp_api
+from api import systems as sys_api
+from api import users as usr_api
+from cli.cache import presenter as cache_presenter
+from cli.output import get_stdout_console
+from core.cache import CacheMode, Resource, get_cache, set_cache_mode
+from core.client import run
+from core.progress import progress_context
+
+app = typer.Typer(help="Manage the local directory cache")
+
+LISTINGS: dict[Resource, Callable[[], Coroutine[Any, Any, list[Any]]]] = {
+    Resource.USERS: lambda: usr_api.list_users([]),
+    Resource.SYSTEMS: lambda: sys_api.list_systems([]),
+    Resource.GROUPS: lambda: grp_api.list_groups([]),
+    Resource.APPLICATIONS: lambda: app_api.list_applications([]),
+}
+
+
+@app.command(name="refresh")
+def refresh_cache(
+    resources: list[Resource] | None = typer.Argument(
+        None,
+        help="The resources to refresh. Defaults to all of them.",
+    ),
+    full: bool = typer.Option(
+        False,
+        "--full",
+        help="Relist everything instead of fetching only what changed.",
+    ),
+) -> None:
+    """
+Bring the cached directory listings up to date. Systems are refreshed \
+incrementally by fetching only new, changed and deleted records unless \
+--full is given or the last full listing is older than \
+'cache_full_sync_interval'. Users are refreshed the same way only while \
+the last full listing is younger than their 'cache_ttl'.
+    """
+    resources = resources or list(Resource)
+
+    async def refresh() -> None:
+        await asyncio.gather(*(LISTINGS[r]() for r in resources))
+
+    set_cache_mode(CacheMode.REBUILD if full else CacheMode.REFRESH)
+    with progress_context():
+        run(refresh())
+    cache_presenter.print_stats(get_cache().stats())
+
+
+@app.command(name="clear")
+def clear_cache(
+    resource: Resource | None = typer.Argument(
+        None,
+        help="The resource to clear. Defaults to the whole cache.",
+    ),
+) -> None:
+    """
+    Delete cached directory listings.
+    """
+    get_cache().clear(resource)
+    get_stdout_console().print(
+        f"[green]Cleared {resource or 'all'} cache.[/green]"
+    )
+
+
+@app.command(name="stats")
+def cache_stats() -> None:
+    """
+    Show the size and age of each cached directory listing.
+    """
+    cache_presenter.print_stats(get_cache().stats())
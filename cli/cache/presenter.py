@@ -0,0 +1,34 @@
+from cli.output import create_table, print_table
+from core.cache import SnapshotStats
+
+
+def _format_age(age: float | None) -> str:
+    if age is None:
+        return "Never"
+    minutes, seconds = divmod(int(age), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes}m ago"
+    if minutes:
+        return f"{minutes}m {seconds}s ago"
+    return f"{seconds}s ago"
+
+
+def print_stats(stats: list[SnapshotStats]) -> None:
+    table = create_table(
+        "Local Cache",
+        ["Resource", "Records", "Refreshed", "Full Sync", "TTL", "Status"],
+    )
+    for snapshot in stats:
+        status = (
+            "[green]fresh[/green]" if snapshot.fresh else "[red]stale[/red]"
+        )
+        table.add_row(
+            snapshot.resource,
+            str(snapshot.count),
+            _format_age(snapshot.age),
+            _format_age(snapshot.sync_age),
+            f"{snapshot.ttl}s",
+            status,
+        )
+    print_table(table)
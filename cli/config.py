@@ -8,11 +8,11 @@ from rich.syntax import Syntax
 from core.config import get_config_path, init_config
 
 app = typer.Typer(help="Manage jam configuration")
-console = Console()
 
 
 @app.command(name="path")
 def show_path() -> None:
+    console = Console()
     config_path = get_config_path()
     console.print(f"[cyan]Configuration file:[/cyan] {config_path}")
     if config_path.exists():
@@ -26,6 +26,7 @@ def show_path() -> None:
 
 @app.command(name="show")
 def show_config() -> None:
+    console = Console()
     config_path = init_config()
     with Path.open(config_path) as file:
         config = file.read()
@@ -52,6 +53,7 @@ def reset_config(
         help="Suppress console output",
     ),
 ) -> None:
+    console = Console()
     config_path = get_config_path()
     if not force and not quiet:
         console.print(
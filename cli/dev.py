@@ -0,0 +1,112 @@
+import asyncio
+import contextlib
+
+import typer
+
+from cli.output import get_stdout_console
+from core.simulator import FakeJumpCloud, Faults, Tenant, serve
+
+app = typer.Typer(help="Tools for developing and load-testing jam")
+
+
+@app.command(name="simulate")
+def simulate(
+    size: int = typer.Option(
+        1000,
+        "--size",
+        help="Users and systems in the simulated tenant.",
+    ),
+    host: str = typer.Option("127.0.0.1", "--host", help="Address to bind."),
+    port: int = typer.Option(8765, "--port", help="Port to listen on."),
+    *,
+    latency: float = typer.Option(
+        0.0,
+        "--latency",
+        help="Seconds added to every response.",
+    ),
+    jitter: float = typer.Option(
+        0.0,
+        "--jitter",
+        help="Up to this many more seconds added at random.",
+    ),
+    rate_limit: float = typer.Option(
+        0.0,
+        "--rate-limit",
+        help="Share of requests answered 429, from 0 to 1.",
+    ),
+    retry_after: float = typer.Option(
+        1.0,
+        "--retry-after",
+        help="Seconds a 429 response asks the client to wait.",
+    ),
+    error_rate: float = typer.Option(
+        0.0,
+        "--error-rate",
+        help="Share of requests that start a burst of 5xx responses.",
+    ),
+    error_burst: int = typer.Option(
+        1,
+        "--error-burst",
+        help="5xx responses in a row per burst.",
+    ),
+    error_status: int = typer.Option(
+        503,
+        "--error-status",
+        help="Status code of the 5xx responses.",
+    ),
+    drip_bytes: int = typer.Option(
+        0,
+        "--drip-bytes",
+        help="Send response bodies this many bytes at a time.",
+    ),
+    drip_delay: float = typer.Option(
+        0.0,
+        "--drip-delay",
+        help="Seconds between dripped chunks.",
+    ),
+    seed: int | None = typer.Option(
+        None,
+        "--seed",
+        help="Seed for the injected faults, to repeat a run exactly.",
+    ),
+) -> None:
+    """
+Serve a simulated JumpCloud tenant over HTTP, with optional latency, rate \
+limiting, 5xx bursts and slow responses. Users, systems, groups, \
+applications, searches, associations and OAuth tokens are all served from \
+generated data, so concurrency and retry behaviour can be load-tested \
+without touching a real tenant. Point jam at it with the api_url and \
+oauth_url settings, as printed on startup.
+    """
+    jumpcloud = FakeJumpCloud(
+        Tenant.of_size(size),
+        Faults(
+            latency=latency,
+            jitter=jitter,
+            rate_limit=rate_limit,
+            retry_after=retry_after,
+            error_rate=error_rate,
+            error_burst=error_burst,
+            error_status=error_status,
+            drip_bytes=drip_bytes,
+            drip_delay=drip_delay,
+            seed=seed,
+        ),
+    )
+    console = get_stdout_console()
+    url = f"http://{host}:{port}"
+    console.print(f"[cyan]Simulating JumpCloud on[/cyan] {url}")
+    console.print(
+        "Run jam against it, with a separate config directory so your "
+        "token is kept:\n"
+        f"  export JAM_CONFIG_PATH=$(mktemp -d) JAM_NO_DAEMON=1 "
+        f"API_URL={url}/api OAUTH_URL={url}/oauth2/token "
+        "JAM_CLIENT_ID=simulated JAM_CLIENT_SECRET=simulated",
+        soft_wrap=True,
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(jumpcloud, host, port))
+    console.print(
+        f"\nServed {jumpcloud.requests} request(s): "
+        f"{jumpcloud.throttled} throttled, {jumpcloud.errors} failed",
+    )
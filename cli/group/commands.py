@@ -1,15 +1,14 @@
-import asyncio
-
 import typer
 
 from api import groups as grp_api
 from cli.group import presenter
 from cli.group.member.commands import app as member_app
 from cli.output import save_to_csv
+from core.client import run
 from core.settings import get_settings
 
 SETTINGS = get_settings()
-app = typer.Typer()
+app = typer.Typer(help="Manage JumpCloud user groups")
 
 app.add_typer(member_app, name="member")
 
@@ -51,7 +50,7 @@ combined into a single list of filters.
         filters = []
     if name:
         filters.append(f"name:eq:{name}")
-    groups = asyncio.run(grp_api.list_groups(filters))
+    groups = run(grp_api.list_groups(filters))
     presenter.print_groups(groups, json)
     if csv_file:
         save_to_csv(groups, csv_file, SETTINGS.csv_group_fields)
@@ -14,6 +14,7 @@ from cli.input import (
     resolve_optional_argument,
 )
 from cli.output import print_error, print_result, save_to_csv
+from core.client import run
 from core.progress import add_task, progress_context, update_task
 from core.settings import get_settings
 from models.group import Group
@@ -48,26 +49,20 @@ def get_group_members(
     """
     group_ids = resolve_list_argument(group_ids)
 
-    async def fetch_data() -> tuple[list[User], list[str]]:
-        _users, _members = await asyncio.gather(
-            usr_api.list_users([]),
-            grp_api.get_groups_members(group_ids),
-        )
-        return _users, _members
+    async def fetch_data() -> list[User]:
+        members = await grp_api.get_groups_members(group_ids)
+        fields = member_presenter.member_fields(json, csv_file)
+        return await usr_api.lookup_users(members, fields)
 
     with progress_context():
-        users, members = asyncio.run(fetch_data())
-    user_dict = {user.id: user for user in users}
-    member_list = list(
-        {member: user_dict[member] for member in members}.values()
-    )
+        member_list = run(fetch_data())
     member_presenter.print_group_members(member_list, json)
     if csv_file:
         save_to_csv(member_list, csv_file, SETTINGS.csv_user_fields)
 
 
 def get_group_by_name(group_name: str) -> list[Group]:
-    groups = asyncio.run(grp_api.list_groups([f"name:eq:{group_name}"]))
+    groups = run(grp_api.list_groups([f"name:eq:{group_name}"]))
     if not groups:
         print_error(f"No group found with name: {group_name}")
         raise typer.Exit(1)
@@ -86,7 +81,7 @@ def get_groups_by_csv(path: Path, group_dict: dict[str, Group]) -> list[Group]:
 
 
 def get_user_by_email(email: str) -> list[User]:
-    users = asyncio.run(usr_api.list_users([f"email:$eq:{email}"]))
+    users = run(usr_api.list_users([f"email:$eq:{email}"]))
     if not users:
         print_error(f"No user found with email: {email}")
         raise typer.Exit(1)
@@ -111,7 +106,7 @@ def resolve_groups(
     group_dict: dict[str, Group],
 ) -> list[Group]:
     if group_id:
-        groups = [asyncio.run(grp_api.get_group(group_id))]
+        groups = [run(grp_api.get_group(group_id))]
     elif group_name:
         groups = get_group_by_name(group_name)
     elif group_csv:
@@ -132,7 +127,7 @@ def resolve_users(
     user_dict: dict[str, User],
 ) -> list[User]:
     if user_id:
-        users = [asyncio.run(usr_api.get_user(user_id))]
+        users = [run(usr_api.get_user(user_id))]
     elif email:
         users = get_user_by_email(email)
     elif user_csv:
@@ -231,7 +226,7 @@ users can be added to any number of groups by utilizing csv files.
                 update_task(task_id, advance=1)
 
     with progress_context():
-        user_dict, group_dict = asyncio.run(fetch_data())
+        user_dict, group_dict = run(fetch_data())
     group_id = resolve_optional_argument(group_id)
     groups = resolve_groups(group_id, group_name, group_csv, group_dict)
     users = resolve_users(user_id, email, user_csv, user_dict)
@@ -241,4 +236,4 @@ users can be added to any number of groups by utilizing csv files.
         "pending. Do you wish to proceed?"
     )
     with progress_context():
-        asyncio.run(run_tasks(groups, users))
+        run(run_tasks(groups, users))
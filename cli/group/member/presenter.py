@@ -3,6 +3,7 @@ from rich.table import Table
 from cli.output import (
     create_table,
     is_piped,
+    output_fields,
     print_json,
     print_table,
     print_values,
@@ -42,6 +43,16 @@ def print_group_members(members: list[User], json: bool) -> None:
         print_table(table)
 
 
+def member_fields(json: bool, csv_file: str | None = None) -> list[str] | None:
+    """The API fields needed to print members, and export them to CSV."""
+    return output_fields(
+        User,
+        json,
+        SETTINGS.console_user_fields.values(),
+        SETTINGS.csv_user_fields if csv_file else None,
+    )
+
+
 def print_change_confirmation(
     users: list[User], groups: list[Group], op: str
 ) -> None:
@@ -1,9 +1,12 @@
 import json
 import sys
-from collections.abc import Sequence
+from collections.abc import AsyncIterable, Iterable, Sequence
+from contextlib import ExitStack
 from csv import DictWriter
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from types import TracebackType
+from typing import IO, Any, Self
 
 from pydantic import BaseModel
 from rich.console import Console
@@ -11,8 +14,25 @@ from rich.table import Table
 
 from core.progress import get_console
 from core.settings import get_settings
+from core.timings import phase
+from models.columns import Columns
+from models.projection import api_fields
+
+
+@lru_cache(maxsize=1)
+def _console_for(stream: IO[str]) -> Console:
+    return Console(file=stream)
+
+
+def get_stdout_console() -> Console:
+    """
+    Return a console for the current stdout.
+
+    Rich decides on colour when a console is created, so a new one is made
+    whenever stdout is replaced, e.g. for each command run by `jam serve`.
+    """
+    return _console_for(sys.stdout)
 
-CONSOLE = Console()
 
 def is_piped() -> bool:
     return not sys.stdout.isatty()
@@ -26,53 +46,222 @@ def create_table(title: str, columns: Sequence[str]) -> Table:
 
 
 def print_table(table: Table) -> None:
-    CONSOLE.print(table)
+    with phase("render"):
+        get_stdout_console().print(table)
 
 
 def print_values(values: list[Any]) -> None:
-    print("\n".join(values))  # noqa: T201
+    with phase("render"):
+        print("\n".join(values))  # noqa: T201
+
+
+def _dump_json(model: BaseModel, indent: int | None = None) -> str:
+    return json.dumps(
+        model.model_dump(mode="json", exclude_none=True), indent=indent
+    )
+
+
+def output_fields(
+    model: type[BaseModel],
+    json: bool,
+    columns: Iterable[str],
+    csv_mapping: dict[str, str] | None = None,
+) -> list[str] | None:
+    """
+    Work out which API fields a listing needs for the requested output.
+
+    Args:
+        model: The model being listed.
+        json: Whether full JSON models will be printed.
+        columns: The attributes shown in the terminal table.
+        csv_mapping: The display name to attribute mapping of a CSV export,
+            if there is one.
+
+    Returns:
+        The API field names, or None if the full records are needed.
+    """
+    if json:
+        return None
+    attributes = ["id"] if is_piped() else list(columns)
+    if csv_mapping:
+        attributes.extend(csv_mapping.values())
+    return api_fields(model, attributes)
 
 
 def print_json(models: Sequence[BaseModel]) -> None:
+    with phase("render"):
+        _print_json(models)
+
+
+def _print_json(models: Sequence[BaseModel]) -> None:
     if not models:
         output = "No results match your query."
     elif len(models) == 1:
-        output = json.dumps(
-            models[0].model_dump(mode="json", exclude_none=True),
-            indent=2,
-        )
+        output = _dump_json(models[0], indent=2)
     else:
-        output = [
-            json.dumps(m.model_dump(mode="json", exclude_none=True))
-            for m in models
-        ]
+        output = [_dump_json(m) for m in models]
     if is_piped():
         print(output)  # noqa: T201
     else:
-        CONSOLE.print(output)
+        get_stdout_console().print(output)
+
+
+class CsvExport:
+    """Writes models to a CSV file in batches as they become available."""
+
+    def __init__(self, filename: str, field_mapping: dict[str, str]) -> None:
+        self.path = get_settings().JAM_WORKING_DIR / filename
+        self.count = 0
+        self._fields = list(field_mapping.values())
+        self._header = {v: k for k, v in field_mapping.items()}
+
+    def __enter__(self) -> Self:
+        self._file = Path.open(self.path, "w")
+        self._writer = DictWriter(self._file, fieldnames=self._fields)
+        # Write header row with display names
+        self._writer.writerow(self._header)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self._file.close()
+        if exc_type is None:
+            get_stdout_console().print(
+                f"Exported {self.count} items to '{self.path}'."
+            )
+
+    def write(self, items: Sequence[BaseModel] | Columns[Any]) -> None:
+        include = set(self._fields)
+        with phase("render"):
+            self._writer.writerows(
+                [
+                    item.model_dump(include=include)
+                    if isinstance(item, BaseModel)
+                    else {
+                        field: getattr(item, field) for field in self._fields
+                    }
+                    for item in items
+                ],
+            )
+        self.count += len(items)
 
 
 def save_to_csv(
-    items: Sequence[BaseModel],
+    items: Sequence[BaseModel] | Columns[Any],
     filename: str,
     field_mapping: dict[str, str],
 ) -> None:
-    file_path = get_settings().JAM_WORKING_DIR / filename
-    fieldnames = list(field_mapping.values())
-    with Path.open(file_path, "w") as file:
-        writer = DictWriter(file, fieldnames=fieldnames)
-        # Write header row with display names
-        writer.writerow({v: k for k, v in field_mapping.items()})
-        writer.writerows(
-            [item.model_dump(include=set(fieldnames)) for item in items],
-        )
-    CONSOLE.print(f"Exported {len(items)} items to '{file_path}'.")
+    with CsvExport(filename, field_mapping) as export:
+        export.write(items)
+
+
+class JsonStream:
+    """
+    Prints models as line-delimited JSON as they become available.
+
+    Output matches print_json: a lone result is pretty-printed and an empty
+    result prints a notice, so the first model is held until a second one
+    arrives.
+    """
+
+    def __init__(self) -> None:
+        self._held: BaseModel | None = None
+        self._count = 0
+
+    def write(self, models: Sequence[BaseModel]) -> None:
+        with phase("render"):
+            self._write(models)
+
+    def _write(self, models: Sequence[BaseModel]) -> None:
+        lines = []
+        for model in models:
+            self._count += 1
+            if self._count == 1:
+                self._held = model
+                continue
+            if self._held is not None:
+                lines.append(_dump_json(self._held))
+                self._held = None
+            lines.append(_dump_json(model))
+        if lines:
+            print("\n".join(lines), flush=True)  # noqa: T201
+
+    def close(self) -> None:
+        with phase("render"):
+            self._close()
+
+    def _close(self) -> None:
+        if self._held is not None:
+            print(_dump_json(self._held, indent=2))  # noqa: T201
+        elif not self._count:
+            print("No results match your query.")  # noqa: T201
+
+
+async def stream_values(pages: AsyncIterable[list[str]]) -> None:
+    """Print each page of values, e.g. IDs, to piped output as it arrives."""
+    async for page in pages:
+        if page:
+            print_values(page)
+
+
+async def stream_models(
+    pages: AsyncIterable[Sequence[BaseModel]],
+    json: bool,
+    csv_file: str | None,
+    field_mapping: dict[str, str],
+) -> None:
+    """
+    Write each page of models to piped output and CSV as soon as it arrives.
+
+    Args:
+        pages: Pages of models, e.g. from one of the api iter_* functions.
+        json: Print line-delimited JSON instead of IDs.
+        csv_file: Also export the models to this CSV file, if given.
+        field_mapping: Display name to attribute mapping for the CSV file.
+    """
+    with ExitStack() as stack:
+        export = None
+        if csv_file:
+            export = stack.enter_context(CsvExport(csv_file, field_mapping))
+        json_stream = JsonStream() if json else None
+        async for page in pages:
+            if export:
+                export.write(page)
+            if json_stream:
+                json_stream.write(page)
+            elif page:
+                print_values([getattr(model, "id") for model in page])  # noqa: B009
+                sys.stdout.flush()
+        if json_stream:
+            json_stream.close()
 
 
 def print_error(msg: str) -> None:
     get_console().print(f"[red]{msg}[/red]")
 
 
+def print_missing(
+    requested: Sequence[str],
+    found: Sequence[str],
+    noun: str,
+) -> bool:
+    """
+    Print an error for each requested ID that was not found.
+
+    Returns:
+        Whether any IDs were missing.
+    """
+    found_ids = set(found)
+    missing = [i for i in dict.fromkeys(requested) if i not in found_ids]
+    for missing_id in missing:
+        print_error(f"No {noun} found with ID: {missing_id}")
+    return bool(missing)
+
+
 def print_result(msg: str, success: bool) -> None:
     get_console().print(
         f"{msg}: "
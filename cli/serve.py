@@ -0,0 +1,124 @@
+import contextlib
+import subprocess
+import sys
+import time
+from contextvars import copy_context
+from pathlib import Path
+
+import typer
+
+from cli.app import run_command
+from cli.output import get_stdout_console, print_error
+from core.client import Session, client_session
+from core.config import PROJECT_ROOT
+from core.daemon import Daemon, request, socket_path
+from core.settings import get_settings
+
+SETTINGS = get_settings()
+STARTUP_TIMEOUT = 10.0
+app = typer.Typer(
+    help="Run a background daemon that keeps jam warm between commands",
+    invoke_without_command=True,
+)
+
+
+def _execute(
+    session: Session, argv: list[str], working_dir: str | None
+) -> int:
+    # Each command gets its own context, so options such as --no-cache do
+    # not leak into the next one, while the daemon's session is shared.
+    settings = get_settings()
+    default_dir = settings.JAM_WORKING_DIR
+    settings.JAM_WORKING_DIR = Path(working_dir) if working_dir else Path()
+    try:
+        return copy_context().run(run_command, argv)
+    finally:
+        settings.JAM_WORKING_DIR = default_dir
+        session.report_retries()
+
+
+def _start_detached() -> None:
+    log_file = Path(SETTINGS.JAM_CONFIG_PATH) / "serve.log"
+    with log_file.open("ab") as log:
+        subprocess.Popen(
+            [sys.executable, str(PROJECT_ROOT / "main.py"), "serve"],
+            cwd=PROJECT_ROOT,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        status = request({"op": "status"})
+        if status is not None:
+            get_stdout_console().print(
+                f"[green]jam daemon started (pid {status['pid']})[/green]",
+            )
+            return
+        time.sleep(0.1)
+    print_error(f"The jam daemon did not start. See {log_file}")
+    raise typer.Exit(1)
+
+
+@app.callback()
+def serve(
+    ctx: typer.Context,
+    detach: bool = typer.Option(
+        False,
+        "-d",
+        "--detach",
+        help="Start the daemon in the background and return.",
+    ),
+) -> None:
+    """
+Serve jam commands from one long-lived process. While it runs, every jam \
+command is handed to it over a Unix socket and reuses its HTTP connections, \
+OAuth token and cache; without it, commands run in-process as usual. \
+Restart the daemon after changing config.json.
+    """
+    if ctx.invoked_subcommand is not None:
+        return
+    if request({"op": "status"}) is not None:
+        print_error("A jam daemon is already running.")
+        raise typer.Exit(1)
+    if detach:
+        _start_detached()
+        return
+    get_stdout_console().print(f"[cyan]Serving jam on[/cyan] {socket_path()}")
+    with client_session() as session:
+        daemon = Daemon(
+            lambda argv, working_dir: _execute(session, argv, working_dir),
+        )
+        with contextlib.suppress(KeyboardInterrupt):
+            daemon.serve_forever()
+
+
+@app.command(name="status")
+def show_status() -> None:
+    """
+    Show whether a jam daemon is running.
+    """
+    status = request({"op": "status"})
+    if status is None:
+        get_stdout_console().print(
+            "[yellow]No jam daemon is running.[/yellow]"
+        )
+        raise typer.Exit(1)
+    get_stdout_console().print(
+        f"[green]Running[/green] (pid {status['pid']}), up "
+        f"{status['uptime']:.0f}s, {status['served']} command(s) served",
+    )
+
+
+@app.command(name="stop")
+def stop() -> None:
+    """
+    Stop the running jam daemon.
+    """
+    if request({"op": "stop"}) is None:
+        get_stdout_console().print(
+            "[yellow]No jam daemon is running.[/yellow]"
+        )
+        raise typer.Exit(1)
+    get_stdout_console().print("[green]jam daemon stopped.[/green]")
@@ -0,0 +1,91 @@
+import contextlib
+import readline
+import shlex
+from contextvars import copy_context
+from pathlib import Path
+
+import typer
+
+from cli.app import run_command
+from cli.output import get_stdout_console, print_error
+from core.cache import CacheMode, get_cache_mode
+from core.client import client_session
+from core.settings import get_settings
+
+SETTINGS = get_settings()
+HISTORY_FILE = Path(SETTINGS.JAM_CONFIG_PATH) / "shell_history"
+HISTORY_LENGTH = 1000
+PROMPT = "jam> "
+EXIT_COMMANDS = frozenset({"exit", "quit"})
+app = typer.Typer(
+    help="Run jam commands interactively in one warm session",
+    invoke_without_command=True,
+)
+
+
+def _load_history() -> None:
+    readline.set_history_length(HISTORY_LENGTH)
+    with contextlib.suppress(OSError):
+        readline.read_history_file(HISTORY_FILE)
+
+
+def _read_command() -> list[str] | None:
+    """
+    Prompt for the next command line.
+
+    Returns:
+        The parsed arguments, which are empty for a blank or invalid line,
+        or None once the user has finished.
+    """
+    try:
+        line = input(PROMPT)
+    except EOFError:
+        get_stdout_console().print()
+        return None
+    except KeyboardInterrupt:
+        get_stdout_console().print()
+        return []
+    try:
+        return shlex.split(line)
+    except ValueError as e:
+        print_error(str(e))
+        return []
+
+
+def _reuse_reads() -> bool:
+    # --no-cache and cache refreshes must reach the API.
+    return get_cache_mode() is CacheMode.ON
+
+
+@app.callback()
+def shell(ctx: typer.Context) -> None:
+    """
+Run jam commands interactively, without the 'jam' prefix, e.g. \
+'user get 685cb0f6ef36c7bd8ac56c24'. Every command shares one event loop, \
+HTTP session and OAuth token, and API reads are reused until a command \
+changes something. Type 'help' for the list of commands and 'exit' or \
+Ctrl-D to leave.
+    """
+    if ctx.invoked_subcommand is not None:
+        return
+    _load_history()
+    get_stdout_console().print(
+        "[cyan]jam shell[/cyan] - type 'help' for commands, 'exit' to leave",
+    )
+    with client_session(memoize=_reuse_reads):
+        try:
+            while (argv := _read_command()) is not None:
+                if not argv:
+                    continue
+                if argv[0] in EXIT_COMMANDS:
+                    break
+                if argv[0] == "help":
+                    argv = [*argv[1:], "--help"]
+                if argv[0] == "shell":
+                    print_error("Already in a jam shell.")
+                    continue
+                # A fresh context per command, so options such as
+                # --no-cache apply to that command only.
+                copy_context().run(run_command, argv)
+        finally:
+            readline.write_history_file(HISTORY_FILE)
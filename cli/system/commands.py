@@ -1,18 +1,37 @@
-import asyncio
-
 import typer
 
 from api import systems as sys_api
 from api import users as usr_api
 from cli.input import resolve_argument, resolve_list_argument
-from cli.output import save_to_csv
+from cli.output import (
+    is_piped,
+    print_missing,
+    save_to_csv,
+    stream_models,
+    stream_values,
+)
 from cli.system import presenter as sys_presenter
 from cli.user import presenter as usr_presenter
+from core.client import run
 from core.progress import progress_context
 from core.settings import get_settings
 
 SETTINGS = get_settings()
-app = typer.Typer()
+app = typer.Typer(help="Manage JumpCloud systems")
+
+
+def _stream_systems(
+    filters: list[str],
+    fields: list[str] | None,
+    json: bool,
+    csv_file: str | None,
+) -> None:
+    if json or csv_file:
+        pages = sys_api.iter_systems(filters, fields)
+        run(stream_models(pages, json, csv_file, SETTINGS.csv_system_fields))
+    else:
+        # Only the IDs are printed, so no models are built.
+        run(stream_values(sys_api.iter_system_ids(filters)))
 
 
 @app.command(name="list")
@@ -63,8 +82,15 @@ combined into a single list of filters.
         filters.append(f"os:$eq:{os}")
     if os_family:
         filters.append(f"osFamily:$eq:{os_family}")
+    fields = sys_presenter.system_fields(json, csv_file)
     with progress_context():
-        systems = asyncio.run(sys_api.list_systems(filters))
+        if is_piped():
+            _stream_systems(filters, fields, json, csv_file)
+            return
+        if fields is not None and SETTINGS.compact_results:
+            systems = run(sys_api.tabulate_systems(filters, fields))
+        else:
+            systems = run(sys_api.list_systems(filters, fields))
     sys_presenter.print_systems(systems, json)
     if csv_file:
         save_to_csv(systems, csv_file, SETTINGS.csv_system_fields)
@@ -89,9 +115,13 @@ def get_system(
     Get a JumpCloud system by its UUID.
     """
     system_ids = resolve_list_argument(system_ids)
+    fields = sys_presenter.system_fields(json)
     with progress_context():
-        systems = asyncio.run(sys_api.get_systems(system_ids))
+        systems = run(sys_api.get_systems(system_ids, fields))
     sys_presenter.print_systems(systems, json)
+    found = [system.id for system in systems]
+    if print_missing(system_ids, found, "system"):
+        raise typer.Exit(1)
 
 
 @app.command(name="fde-key")
@@ -106,7 +136,7 @@ def fde_key(
     Returns the full disk encryption key for the specified system UUID.
     """
     system_id = resolve_argument(system_id, "System ID")
-    key = asyncio.run(sys_api.get_fde_key(system_id))
+    key = run(sys_api.get_fde_key(system_id))
     sys_presenter.print_fde_key(key)
 
 
@@ -130,7 +160,7 @@ If the query returns multiple results, a table of matching systems will \
 be displayed instead of a single UUID.
     """
     query = resolve_argument(query, "Hostname or serial number")
-    systems = asyncio.run(sys_api.find_system(query))
+    systems = run(sys_api.find_system(query))
     sys_presenter.print_systems(systems, json)
 
 
@@ -153,9 +183,10 @@ def list_user_associations(
     Find all users bound to a system.
     """
     system_id = resolve_argument(system_id, "System ID")
-    associations = asyncio.run(sys_api.list_associations("user", system_id))
+    associations = run(sys_api.list_associations("user", system_id))
     user_ids = [
         association.to.id for association in associations if association.to
     ]
-    users = asyncio.run(usr_api.get_users(user_ids))
+    fields = usr_presenter.user_fields(json)
+    users = run(usr_api.get_users(user_ids, fields))
     usr_presenter.print_users(users, json)
@@ -1,13 +1,17 @@
+from collections.abc import Iterable, Sequence
+
 from rich.table import Table
 
 from cli.output import (
     create_table,
     is_piped,
+    output_fields,
     print_json,
     print_table,
     print_values,
 )
 from core.settings import get_settings
+from models.columns import Columns
 from models.system import System
 
 SETTINGS = get_settings()
@@ -20,7 +24,7 @@ def _get_system_table(title: str) -> Table:
     )
 
 
-def _add_system_rows(table: Table, systems: list[System]) -> None:
+def _add_system_rows(table: Table, systems: Iterable[System]) -> None:
     for system in systems:
         row_values = [
             getattr(system, attr)
@@ -29,7 +33,9 @@ def _add_system_rows(table: Table, systems: list[System]) -> None:
         table.add_row(*row_values)
 
 
-def print_systems(systems: list[System], json: bool) -> None:
+def print_systems(
+    systems: Sequence[System] | Columns[System], json: bool
+) -> None:
     if json:
         print_json(systems)
     elif is_piped():
@@ -42,3 +48,13 @@ def print_systems(systems: list[System], json: bool) -> None:
 
 def print_fde_key(fde_key: str) -> None:
     print_values([fde_key])
+
+
+def system_fields(json: bool, csv_file: str | None = None) -> list[str] | None:
+    """The API fields needed to print systems, and export them to CSV."""
+    return output_fields(
+        System,
+        json,
+        SETTINGS.console_system_fields.values(),
+        SETTINGS.csv_system_fields if csv_file else None,
+    )
@@ -1,18 +1,37 @@
-import asyncio
-
 import typer
 
 from api import systems as sys_api
 from api import users as usr_api
 from cli.input import resolve_argument, resolve_list_argument
-from cli.output import save_to_csv
+from cli.output import (
+    is_piped,
+    print_missing,
+    save_to_csv,
+    stream_models,
+    stream_values,
+)
 from cli.system import presenter as sys_presenter
 from cli.user import presenter as usr_presenter
+from core.client import run
 from core.progress import progress_context
 from core.settings import get_settings
 
 SETTINGS = get_settings()
-app = typer.Typer()
+app = typer.Typer(help="Manage JumpCloud system users")
+
+
+def _stream_users(
+    filters: list[str],
+    fields: list[str] | None,
+    json: bool,
+    csv_file: str | None,
+) -> None:
+    if json or csv_file:
+        pages = usr_api.iter_users(filters, fields)
+        run(stream_models(pages, json, csv_file, SETTINGS.csv_user_fields))
+    else:
+        # Only the IDs are printed, so no models are built.
+        run(stream_values(usr_api.iter_user_ids(filters)))
 
 
 @app.command(name="list")
@@ -86,8 +105,15 @@ combined into a single list of filters.
         filters.append(f"state:$eq:{state}")
     if employee_type:
         filters.append(f"employeeType:$eq:{employee_type}")
+    fields = usr_presenter.user_fields(json, csv_file)
     with progress_context():
-        users = asyncio.run(usr_api.list_users(filters))
+        if is_piped():
+            _stream_users(filters, fields, json, csv_file)
+            return
+        if fields is not None and SETTINGS.compact_results:
+            users = run(usr_api.tabulate_users(filters, fields))
+        else:
+            users = run(usr_api.list_users(filters, fields))
     usr_presenter.print_users(users, json)
     if csv_file:
         save_to_csv(users, csv_file, SETTINGS.csv_user_fields)
@@ -113,9 +139,13 @@ Get a JumpCloud system user by their UUID. Use 'find-user' to get a user's \
 UUID by their email address.
     """
     user_ids = resolve_list_argument(user_ids)
+    fields = usr_presenter.user_fields(json)
     with progress_context():
-        users = asyncio.run(usr_api.get_users(user_ids))
+        users = run(usr_api.get_users(user_ids, fields))
     usr_presenter.print_users(users, json)
+    found = [user.id for user in users]
+    if print_missing(user_ids, found, "user"):
+        raise typer.Exit(1)
 
 
 @app.command(name="find")
@@ -138,7 +168,7 @@ multiple results, a table of matching users will be displayed instead of a \
 single UUID.
     """
     email = resolve_argument(email, "Email")
-    users = asyncio.run(usr_api.find_user(email))
+    users = run(usr_api.find_user(email))
     usr_presenter.print_users(users, json)
 
 
@@ -163,6 +193,7 @@ returns multiple results, a table of matching systems will be displayed \
 instead of a list of UUIDs.
     """
     user_id = resolve_argument(user_id, "User ID")
-    system_ids = asyncio.run(usr_api.list_bound_systems(user_id))
-    systems = asyncio.run(sys_api.get_systems(system_ids))
+    system_ids = run(usr_api.list_bound_systems(user_id))
+    fields = sys_presenter.system_fields(json)
+    systems = run(sys_api.get_systems(system_ids, fields))
     sys_presenter.print_systems(systems, json)
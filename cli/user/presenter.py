@@ -1,13 +1,17 @@
+from collections.abc import Iterable, Sequence
+
 from rich.table import Table
 
 from cli.output import (
     create_table,
     is_piped,
+    output_fields,
     print_json,
     print_table,
     print_values,
 )
 from core.settings import get_settings
+from models.columns import Columns
 from models.user import User
 
 SETTINGS = get_settings()
@@ -17,7 +21,7 @@ def _get_user_table(title: str) -> Table:
     return create_table(title, list(SETTINGS.console_user_fields.keys()))
 
 
-def _add_user_rows(table: Table, users: list[User]) -> None:
+def _add_user_rows(table: Table, users: Iterable[User]) -> None:
     for user in users:
         row_values = [
             getattr(user, attr)
@@ -26,7 +30,7 @@ def _add_user_rows(table: Table, users: list[User]) -> None:
         table.add_row(*row_values)
 
 
-def print_users(users: list[User], json: bool) -> None:
+def print_users(users: Sequence[User] | Columns[User], json: bool) -> None:
     if json:
         print_json(users)
     elif is_piped():
@@ -35,3 +39,13 @@ def print_users(users: list[User], json: bool) -> None:
         table = _get_user_table(f"Users - Total Count: {len(users)}")
         _add_user_rows(table, users)
         print_table(table)
+
+
+def user_fields(json: bool, csv_file: str | None = None) -> list[str] | None:
+    """The API fields needed to print users, and export them to CSV."""
+    return output_fields(
+        User,
+        json,
+        SETTINGS.console_user_fields.values(),
+        SETTINGS.csv_user_fields if csv_file else None,
+    )
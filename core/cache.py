@@ -0,0 +1,578 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections.abc import (
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Coroutine,
+    Iterable,
+)
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from enum import StrEnum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+from core.client import get_client
+from core.paginator import Params, TotalCount, paginate
+from core.query import (
+    UnsupportedFilterError,
+    compile_filters,
+    field_expression,
+)
+from core.settings import get_settings
+
+SETTINGS = get_settings()
+CACHE_FILE = Path(SETTINGS.JAM_CONFIG_PATH) / "cache.db"
+# Cached records are replayed to callers in pages of this size.
+CHUNK_SIZE = 1000
+# Bump when the schema changes; older cache files are simply rebuilt.
+SCHEMA_VERSION = 3
+# Delta syncs also refetch records changed this long before the last sync
+# started, in case the local clock runs ahead of JumpCloud's.
+CLOCK_SKEW = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    resource TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (resource, generation, id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    resource TEXT PRIMARY KEY,
+    generation INTEGER NOT NULL,
+    refreshed_at REAL NOT NULL,
+    synced_at REAL NOT NULL,
+    count INTEGER NOT NULL,
+    listed_at REAL
+);
+"""
+
+
+class Resource(StrEnum):
+    USERS = "users"
+    SYSTEMS = "systems"
+    GROUPS = "groups"
+    APPLICATIONS = "applications"
+
+
+# Fields commonly filtered on get an expression index for offline queries.
+INDEXED_FIELDS: dict[Resource, tuple[str, ...]] = {
+    Resource.USERS: (
+        "email",
+        "state",
+        "department",
+        "costCenter",
+        "jobTitle",
+        "employeeType",
+    ),
+    Resource.SYSTEMS: ("hostname", "serialNumber", "os", "osFamily"),
+    Resource.GROUPS: ("name",),
+    Resource.APPLICATIONS: ("displayLabel", "active"),
+}
+
+
+class CacheMode(StrEnum):
+    ON = "on"
+    OFF = "off"
+    # Skip reading the cache but bring it up to date.
+    REFRESH = "refresh"
+    # Skip reading the cache and replace it with a full listing.
+    REBUILD = "rebuild"
+
+
+class DeltaSpec(BaseModel):
+    """How to fetch only what changed in a v1 listing since the last sync."""
+
+    endpoint: str
+    # Timestamp fields; records changed since the last sync are refetched.
+    watermarks: tuple[str, ...]
+    # Seconds after a full listing that delta syncs may build on, or None
+    # for `cache_full_sync_interval`. Resources whose watermarks miss some
+    # edits use their TTL, so a stale snapshot is always relisted.
+    full_sync_interval: int | None = None
+
+
+class SnapshotStats(BaseModel):
+    resource: Resource
+    count: int
+    age: float | None
+    sync_age: float | None
+    ttl: int
+
+    @property
+    def fresh(self) -> bool:
+        return self.age is not None and self.age < self.ttl
+
+
+_mode_ctx: ContextVar[CacheMode | None] = ContextVar(
+    "cache_mode", default=None
+)
+
+
+def set_cache_mode(mode: CacheMode) -> None:
+    _mode_ctx.set(mode)
+
+
+def get_cache_mode() -> CacheMode:
+    mode = _mode_ctx.get()
+    if mode is None:
+        return CacheMode.ON if SETTINGS.cache_enabled else CacheMode.OFF
+    return mode
+
+
+def _timestamp(when: float) -> str:
+    # JumpCloud's format, which compares correctly as text.
+    return datetime.fromtimestamp(when, tz=UTC).strftime(
+        "%Y-%m-%dT%H:%M:%S.%fZ"
+    )
+
+
+def _record_id(record: dict[str, Any]) -> str:
+    return str(record.get("_id") or record.get("id"))
+
+
+class DirectoryCache:
+    """A local SQLite snapshot of each directory listing, keyed by ID."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=SETTINGS.timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version != SCHEMA_VERSION:
+            self._conn.executescript(
+                "DROP TABLE IF EXISTS records;DROP TABLE IF EXISTS snapshots;",
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+        self._create_indexes()
+        self._syncs: dict[Resource, asyncio.Task[None]] = {}
+
+    def _create_indexes(self) -> None:
+        for resource, fields in INDEXED_FIELDS.items():
+            for field in fields:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{resource}_{field} "
+                    f"ON records (resource, generation, "
+                    f"{field_expression(field)})",
+                )
+
+    def ttl(self, resource: Resource) -> int:
+        return SETTINGS.cache_ttl.get(resource, 0)
+
+    def _since(self, column: str, resource: Resource) -> float | None:
+        row = self._conn.execute(
+            f"SELECT {column} FROM snapshots WHERE resource = ?",  # noqa: S608
+            (resource,),
+        ).fetchone()
+        return None if row is None else time.time() - row[0]
+
+    def age(self, resource: Resource) -> float | None:
+        return self._since("refreshed_at", resource)
+
+    def sync_age(self, resource: Resource) -> float | None:
+        """Return the seconds since the last full listing was stored."""
+        return self._since("synced_at", resource)
+
+    def can_sync_delta(self, resource: Resource, spec: DeltaSpec) -> bool:
+        interval = spec.full_sync_interval
+        if interval is None:
+            interval = SETTINGS.cache_full_sync_interval
+        sync_age = self.sync_age(resource)
+        return sync_age is not None and sync_age < interval
+
+    def is_fresh(
+        self,
+        resource: Resource,
+        delta: DeltaSpec | None = None,
+    ) -> bool:
+        """
+        Return whether the snapshot is younger than its TTL.
+
+        With `delta`, the last full listing must also be recent enough to
+        sync from, since a delta sync refreshes only what its watermarks
+        catch.
+        """
+        age = self.age(resource)
+        if age is None or age >= self.ttl(resource):
+            return False
+        return delta is None or self.can_sync_delta(resource, delta)
+
+    async def shared_sync(
+        self,
+        resource: Resource,
+        sync: Callable[[], Coroutine[Any, Any, None]],
+    ) -> None:
+        """
+        Run `sync` for a resource, or join the one already running.
+
+        Callers that find the same snapshot stale at once, such as batched
+        ID lookups, then wait on a single sync instead of each running
+        their own against the same records.
+        """
+        task = self._syncs.get(resource)
+        if task is None:
+            task = asyncio.ensure_future(sync())
+            self._syncs[resource] = task
+            task.add_done_callback(lambda _: self._syncs.pop(resource, None))
+        # A caller that is cancelled leaves the sync running for the rest.
+        await asyncio.shield(task)
+
+    async def iter_records(
+        self,
+        resource: Resource,
+        filters: list[str] | None = None,
+    ) -> AsyncGenerator[list[dict[str, Any]]]:
+        """
+        Yield the current snapshot, optionally narrowed by API filters.
+
+        Raises:
+            UnsupportedFilterError: If a filter cannot be evaluated locally.
+        """
+        condition, params = compile_filters(filters or [])
+        cursor = self._conn.execute(
+            "SELECT data FROM records WHERE resource = ? AND generation = ("  # noqa: S608
+            "SELECT generation FROM snapshots WHERE resource = ?"
+            f") AND {condition} ORDER BY id",
+            (resource, resource, *params),
+        )
+        while rows := cursor.fetchmany(CHUNK_SIZE):
+            yield [json.loads(data) for (data,) in rows]
+
+    def add_records(
+        self,
+        resource: Resource,
+        generation: int,
+        records: list[dict[str, Any]],
+    ) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?)",
+                [
+                    (resource, generation, _record_id(r), json.dumps(r))
+                    for r in records
+                ],
+            )
+
+    def commit_snapshot(
+        self,
+        resource: Resource,
+        generation: int,
+        listed_at: float,
+    ) -> None:
+        """
+        Make `generation` the current snapshot and drop older ones.
+
+        `listed_at` is when its listing started, which later delta syncs
+        fetch changes from.
+        """
+        with self._conn:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM records "
+                "WHERE resource = ? AND generation = ?",
+                (resource, generation),
+            ).fetchone()
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (resource, generation, "
+                "refreshed_at, synced_at, count, listed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (resource, generation, now, now, count, listed_at),
+            )
+            self._conn.execute(
+                "DELETE FROM records WHERE resource = ? AND generation != ?",
+                (resource, generation),
+            )
+        # Refresh planner statistics so filtered queries use the indexes.
+        self._conn.execute("PRAGMA optimize")
+
+    def discard_snapshot(self, resource: Resource, generation: int) -> None:
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM records WHERE resource = ? AND generation = ?",
+                (resource, generation),
+            )
+
+    def watermark(self, resource: Resource, field: str) -> str | None:
+        """
+        Return the timestamp after which a record counts as changed.
+
+        This is when the last listing or delta sync started, less
+        CLOCK_SKEW, so a record changed on a page that was already fetched
+        is caught next time. Snapshots without a start time use the newest
+        cached value of the field, or their refresh time when no cached
+        record has the field set yet.
+        """
+        row = self._conn.execute(
+            "SELECT listed_at, refreshed_at FROM snapshots WHERE resource = ?",
+            (resource,),
+        ).fetchone()
+        if row is None:
+            return None
+        listed_at, refreshed_at = row
+        if listed_at is not None:
+            return _timestamp(listed_at - CLOCK_SKEW)
+        (mark,) = self._conn.execute(
+            "SELECT MAX(json_extract(data, ?)) FROM records "
+            "JOIN snapshots USING (resource, generation) WHERE resource = ?",
+            (f"$.{field}", resource),
+        ).fetchone()
+        return mark or _timestamp(refreshed_at)
+
+    def ids(self, resource: Resource) -> set[str]:
+        cursor = self._conn.execute(
+            "SELECT id FROM records "
+            "JOIN snapshots USING (resource, generation) WHERE resource = ?",
+            (resource,),
+        )
+        return {record_id for (record_id,) in cursor}
+
+    def upsert(
+        self,
+        resource: Resource,
+        records: list[dict[str, Any]],
+    ) -> None:
+        """Insert or replace records in the current snapshot."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO records SELECT resource, generation, "
+                "?, ? FROM snapshots WHERE resource = ?",
+                [(_record_id(r), json.dumps(r), resource) for r in records],
+            )
+
+    def delete(self, resource: Resource, record_ids: Iterable[str]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM records WHERE resource = ? AND id = ?",
+                [(resource, record_id) for record_id in record_ids],
+            )
+
+    def touch(self, resource: Resource, listed_at: float) -> None:
+        """Mark the current snapshot as synced from `listed_at` onwards."""
+        with self._conn:
+            self._conn.execute(
+                "UPDATE snapshots SET refreshed_at = ?, listed_at = ?, "
+                "count = ("
+                "SELECT COUNT(*) FROM records r WHERE r.resource = "
+                "snapshots.resource AND r.generation = snapshots.generation"
+                ") WHERE resource = ?",
+                (time.time(), listed_at, resource),
+            )
+
+    def count(self, resource: Resource) -> int:
+        row = self._conn.execute(
+            "SELECT count FROM snapshots WHERE resource = ?",
+            (resource,),
+        ).fetchone()
+        return 0 if row is None else row[0]
+
+    def clear(self, resource: Resource | None = None) -> None:
+        resources = [resource] if resource else list(Resource)
+        with self._conn:
+            for name in resources:
+                self._conn.execute(
+                    "DELETE FROM records WHERE resource = ?",
+                    (name,),
+                )
+                self._conn.execute(
+                    "DELETE FROM snapshots WHERE resource = ?",
+                    (name,),
+                )
+        if resource is None:
+            self._conn.execute("VACUUM")
+
+    def stats(self) -> list[SnapshotStats]:
+        return [
+            SnapshotStats(
+                resource=resource,
+                count=self.count(resource),
+                age=self.age(resource),
+                sync_age=self.sync_age(resource),
+                ttl=self.ttl(resource),
+            )
+            for resource in Resource
+        ]
+
+
+@lru_cache
+def get_cache() -> DirectoryCache:
+    return DirectoryCache(CACHE_FILE)
+
+
+async def _remote_count(endpoint: str) -> int:
+    params = {"limit": 1, "fields": "_id"}
+    response = await get_client().get(endpoint, params=params)
+    response.raise_for_status()
+    return response.json().get("totalCount", 0)
+
+
+async def directory_size(resource: Resource, endpoint: str) -> int:
+    """
+    Estimate how many records a v1 resource has.
+
+    The cached snapshot's count is used when there is one, since it is
+    free; otherwise JumpCloud is asked for the total.
+    """
+    if get_cache_mode() is not CacheMode.OFF:
+        count = get_cache().count(resource)
+        if count:
+            return count
+    return await _remote_count(endpoint)
+
+
+async def _fetch_changed(
+    cache: DirectoryCache,
+    resource: Resource,
+    spec: DeltaSpec,
+    field: str,
+) -> None:
+    mark = cache.watermark(resource, field)
+    if mark is None:
+        return
+    params: Params = [
+        ("limit", SETTINGS.limit),
+        ("sort", "_id"),
+        ("filter[0]", f"{field}:$gt:{mark}"),
+    ]
+    description = f"Syncing changed {resource} from JumpCloud"
+    async for page in paginate(
+        spec.endpoint, params, TotalCount.BODY, description
+    ):
+        cache.upsert(resource, page)
+
+
+async def sync_delta(
+    cache: DirectoryCache,
+    resource: Resource,
+    spec: DeltaSpec,
+) -> None:
+    """
+    Bring a cached snapshot up to date without relisting everything.
+
+    Records whose watermark fields changed since the last sync started are
+    refetched and upserted. Deletions are detected by comparing the
+    remote total with the local count, and only on a mismatch is an ID-only
+    listing fetched to find which records are gone.
+    """
+    started = time.time()
+    await asyncio.gather(
+        *(
+            _fetch_changed(cache, resource, spec, field)
+            for field in spec.watermarks
+        ),
+    )
+    if await _remote_count(spec.endpoint) != len(cache.ids(resource)):
+        params: Params = [
+            ("limit", SETTINGS.limit),
+            ("sort", "_id"),
+            ("fields", "_id"),
+        ]
+        pages = paginate(
+            spec.endpoint,
+            params,
+            TotalCount.BODY,
+            f"Checking for deleted {resource} in JumpCloud",
+        )
+        remote = {_record_id(r) async for page in pages for r in page}
+        cache.delete(resource, cache.ids(resource) - remote)
+    cache.touch(resource, started)
+
+
+def _is_queryable(filters: list[str] | None) -> bool:
+    try:
+        compile_filters(filters or [])
+    except UnsupportedFilterError:
+        return False
+    return True
+
+
+async def _bring_fresh(
+    cache: DirectoryCache,
+    resource: Resource,
+    delta: DeltaSpec | None,
+    mode: CacheMode,
+) -> bool:
+    if mode is CacheMode.ON and cache.is_fresh(resource, delta):
+        return True
+    if (
+        delta
+        and mode is not CacheMode.REBUILD
+        and cache.can_sync_delta(resource, delta)
+    ):
+        await cache.shared_sync(
+            resource, lambda: sync_delta(cache, resource, delta)
+        )
+        return True
+    return False
+
+
+async def cached_pages(
+    resource: Resource,
+    pages: AsyncIterator[list[dict[str, Any]]],
+    delta: DeltaSpec | None = None,
+    filters: list[str] | None = None,
+    projected: AsyncIterator[list[dict[str, Any]]] | None = None,
+) -> AsyncGenerator[list[dict[str, Any]]]:
+    """
+    Serve a directory listing from the local cache when it is fresh.
+
+    Filters in JumpCloud's `field:$op:value` syntax are evaluated against
+    the snapshot with SQLite, using expression indexes on common fields.
+    Filters that cannot be evaluated locally, or a stale snapshot that
+    cannot be synced incrementally, send a filtered listing to the API
+    uncached; only unfiltered listings replace the snapshot.
+
+    A stale snapshot is brought up to date with `sync_delta` when the
+    resource supports it and the last full listing is younger than the
+    spec's `full_sync_interval`. Otherwise the listing is fetched from
+    `pages` and written to the cache as it streams past. The snapshot is
+    only replaced once every page has been fetched, so an interrupted
+    listing leaves the old one intact and concurrent listings of different
+    resources never share a transaction.
+
+    Args:
+        resource: The resource being listed.
+        pages: The uncached listing. It is not started on a cache hit.
+        delta: How to fetch only changed records, if the endpoint allows.
+        filters: Filters to apply to the listing.
+        projected: The listing with only the fields the caller needs. It
+            replaces `pages` whenever the result will not be cached, since
+            the snapshot must hold full records.
+
+    Yields:
+        Pages of raw API records.
+    """
+    mode = get_cache_mode()
+    uncached = projected or pages
+    if mode is CacheMode.OFF or not _is_queryable(filters):
+        async for page in uncached:
+            yield page
+        return
+    cache = get_cache()
+    fresh = await _bring_fresh(cache, resource, delta, mode)
+    if fresh:
+        async for page in cache.iter_records(resource, filters):
+            yield page
+        return
+    if filters:
+        async for page in uncached:
+            yield page
+        return
+    listed_at = time.time()
+    generation = time.time_ns()
+    try:
+        async for page in pages:
+            cache.add_records(resource, generation, page)
+            yield page
+    except BaseException:
+        cache.discard_snapshot(resource, generation)
+        raise
+    cache.commit_snapshot(resource, generation, listed_at)
@@ -1,5 +1,10 @@
-import atexit
+import asyncio
+import os
+import tempfile
 from base64 import b64encode
+from collections.abc import AsyncGenerator, Callable, Coroutine, Generator
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, copy_context
 from datetime import datetime, timedelta
 from functools import lru_cache
 from pathlib import Path
@@ -9,12 +14,26 @@ import httpx
 from httpx import AsyncClient, Response
 from pydantic import BaseModel
 from pytz import utc
+from rich.console import Console
 
+from core.locking import FileLock
+from core.memo import MemoTransport
+from core.retry import RetryBudget, RetryTransport
+from core.scheduler import (
+    RequestScheduler,
+    SchedulingTransport,
+    SharedRateLimit,
+)
 from core.settings import get_settings
+from core.timings import TimingTransport, phase
+from core.tracing import span
 
 SETTINGS = get_settings()
 CONFIG_PATH = Path(SETTINGS.JAM_CONFIG_PATH)
 TOKEN_FILE = CONFIG_PATH / "token.json"
+TOKEN_LOCK_FILE = CONFIG_PATH / "token.lock"
+RATE_LIMIT_FILE = CONFIG_PATH / "ratelimit"
+UNAUTHORIZED = 401
 
 
 class TokenState(BaseModel):
@@ -23,9 +42,28 @@ class TokenState(BaseModel):
 
 
 class TokenFactory:
-    def __init__(self) -> None:
-        self._state = self._load()
-        atexit.register(self._save)
+    """
+    Issues OAuth access tokens, refreshing them before they expire.
+
+    Refreshes are single-flight: coroutines that find the token expiring
+    while another is already fetching a new one wait for that request
+    instead of sending their own, and other jam processes wait on a lock
+    file and then pick up the token from disk. The token file is rewritten
+    atomically, and only when a new token was issued.
+
+    Args:
+        transport: Requests tokens through this transport, e.g. a simulated
+            JumpCloud, instead of the network. Its tokens are kept in
+            memory only, never in the token file.
+    """
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport | None = None
+    ) -> None:
+        self._transport = transport
+        self._state = self._load() if transport is None else TokenState()
+        self._lock: asyncio.Lock | None = None
+        self._lock_loop: asyncio.AbstractEventLoop | None = None
 
     def _load(self) -> TokenState:
         try:
@@ -35,10 +73,30 @@ class TokenFactory:
             return TokenState()
 
     def _save(self) -> None:
-        with Path.open(TOKEN_FILE, "w") as file:
-            file.write(self._state.model_dump_json(indent=2))
+        fd, tmp = tempfile.mkstemp(dir=CONFIG_PATH, prefix=".token.")
+        try:
+            with os.fdopen(fd, "w") as file:
+                file.write(self._state.model_dump_json(indent=2))
+            Path(tmp).replace(TOKEN_FILE)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _get_lock(self) -> asyncio.Lock:
+        # A lock is bound to one event loop; each session runs its own.
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
 
-    def _request_token(self) -> None:
+    def _expiring(self) -> bool:
+        if self._state.access_token is None or self._state.expires_at is None:
+            return True
+        margin = timedelta(seconds=SETTINGS.token_refresh_margin)
+        return self._state.expires_at - margin < datetime.now(tz=utc)
+
+    async def _request_token(self) -> None:
         creds: str = b64encode(
             f"{SETTINGS.client_id}:{SETTINGS.client_secret}".encode(),
         ).decode()
@@ -51,42 +109,221 @@ class TokenFactory:
             "scope": "api",
             "grant_type": "client_credentials",
         }
-        response: Response = httpx.post(
-            SETTINGS.oauth_url,
-            headers=headers,
-            data=data,
-            timeout=SETTINGS.timeout,
-        )
+        async with AsyncClient(
+            timeout=SETTINGS.timeout, transport=self._transport
+        ) as client:
+            response: Response = await client.post(
+                SETTINGS.oauth_url,
+                headers=headers,
+                data=data,
+            )
         response.raise_for_status()
         body: dict[str, Any] = response.json()
-        self._state.access_token = body["access_token"]
-        self._state.expires_at = datetime.now(tz=utc) + timedelta(
-            seconds=body["expires_in"],
+        self._state = TokenState(
+            access_token=body["access_token"],
+            expires_at=datetime.now(tz=utc)
+            + timedelta(seconds=body["expires_in"]),
         )
+        if self._transport is None:
+            self._save()
+
+    async def get_token(self, rejected: str | None = None) -> str:
+        """
+        Return a valid bearer token, refreshing it if needed.
 
-    def get_token(self) -> str:
-        if (
-            self._state.expires_at is None
-            or self._state.expires_at < datetime.now(tz=utc)
-        ):
-            self._request_token()
+        Args:
+            rejected: A token the API just answered with 401. It is
+                replaced unless another coroutine already did so.
+
+        Returns:
+            The Authorization header value.
+        """
+        token = f"Bearer {self._state.access_token}"
+        if not self._expiring() and token != rejected:
+            return token
+        persisted = self._transport is None
+        file_lock = FileLock(TOKEN_LOCK_FILE) if persisted else nullcontext()
+        async with self._get_lock(), file_lock:
+            if persisted:
+                # Another jam process may have refreshed it while we waited.
+                self._state = self._load()
+            token = f"Bearer {self._state.access_token}"
+            if self._expiring() or token == rejected:
+                with phase("token"):
+                    await self._request_token()
         return f"Bearer {self._state.access_token}"
 
 
+class TokenAuth(httpx.Auth):
+    """Signs each request with a bearer token and retries it once on 401."""
+
+    def __init__(self, factory: TokenFactory) -> None:
+        self._factory = factory
+
+    async def async_auth_flow(
+        self,
+        request: httpx.Request,
+    ) -> AsyncGenerator[httpx.Request, Response]:
+        token = await self._factory.get_token()
+        request.headers["Authorization"] = token
+        response = yield request
+        if response.status_code == UNAUTHORIZED:
+            token = await self._factory.get_token(rejected=token)
+            request.headers["Authorization"] = token
+            yield request
+
+
 @lru_cache
 def get_token_factory() -> TokenFactory:
     return TokenFactory()
 
 
-def get_client() -> AsyncClient:
-    token_factory = get_token_factory()
+def _build_client(
+    retry_budget: RetryBudget,
+    memoize: Callable[[], bool] | None,
+    network: httpx.AsyncBaseTransport | None,
+) -> AsyncClient:
     headers: dict[str, Any] = {
         "Accept": "application/json",
         "Content-Type": "application/json",
-        "Authorization": token_factory.get_token(),
     }
+    limits = httpx.Limits(
+        max_connections=SETTINGS.max_connections,
+        max_keepalive_connections=SETTINGS.max_keepalive_connections,
+        keepalive_expiry=SETTINGS.keepalive_expiry,
+    )
+    shared_limit = None
+    if SETTINGS.shared_rate_limit > 0:
+        shared_limit = SharedRateLimit(
+            RATE_LIMIT_FILE, SETTINGS.shared_rate_limit
+        )
+    scheduler = RequestScheduler(
+        max_concurrency=SETTINGS.max_concurrency,
+        max_throttle_retries=SETTINGS.max_throttle_retries,
+        throttle_backoff=SETTINGS.throttle_backoff,
+        shared_limit=shared_limit,
+    )
+    transport = TimingTransport(
+        RetryTransport(
+            SchedulingTransport(
+                network or httpx.AsyncHTTPTransport(limits=limits), scheduler
+            ),
+            budget=retry_budget,
+            max_retries=SETTINGS.max_retries,
+            backoff=SETTINGS.retry_backoff,
+            max_backoff=SETTINGS.retry_max_backoff,
+        ),
+    )
+    if memoize is not None:
+        transport = MemoTransport(transport, memoize, SETTINGS.shell_memo_ttl)
     return AsyncClient(
         base_url=SETTINGS.api_url,
         headers=headers,
-        timeout=SETTINGS.timeout,
+        auth=TokenAuth(
+            get_token_factory() if network is None else TokenFactory(network)
+        ),
+        # Waiting for a free pooled connection is not a server timeout.
+        timeout=httpx.Timeout(SETTINGS.timeout, pool=None),
+        transport=transport,
     )
+
+
+class Session:
+    """
+    A single event loop and pooled AsyncClient shared by a whole command.
+
+    The client is created on first use, and a token is only requested
+    with the first API call, so commands that never touch the API never
+    authenticate or open a connection.
+
+    Args:
+        memoize: If given, successful reads are replayed for up to
+            `shell_memo_ttl` seconds whenever it returns True.
+        network: Sends requests in place of the network, e.g. a simulated
+            JumpCloud. Scheduling and retries still apply.
+    """
+
+    def __init__(
+        self,
+        memoize: Callable[[], bool] | None = None,
+        network: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self._runner = asyncio.Runner()
+        self._client: AsyncClient | None = None
+        self._memoize = memoize
+        self._network = network
+        self.retry_budget = RetryBudget(SETTINGS.retry_budget)
+
+    @property
+    def client(self) -> AsyncClient:
+        if self._client is None:
+            self._client = _build_client(
+                self.retry_budget, self._memoize, self._network
+            )
+        return self._client
+
+    def run[T](self, coroutine: Coroutine[Any, Any, T]) -> T:
+        return self._runner.run(coroutine, context=copy_context())
+
+    def close(self) -> None:
+        try:
+            if self._client is not None:
+                self._runner.run(self._client.aclose())
+        finally:
+            self._client = None
+            self._runner.close()
+        self.report_retries()
+
+    def report_retries(self) -> None:
+        """Print how many requests were retried, then reset the count."""
+        if self.retry_budget.used:
+            Console(stderr=True).print(
+                f"[dim]Retried {self.retry_budget.used} failed "
+                "request(s)[/dim]",
+            )
+        self.retry_budget.reset()
+
+
+_session_ctx: ContextVar[Session | None] = ContextVar("session", default=None)
+
+
+@contextmanager
+def client_session(
+    memoize: Callable[[], bool] | None = None,
+    network: httpx.AsyncBaseTransport | None = None,
+) -> Generator[Session]:
+    """
+    Open a shared client session, or reuse the one already active.
+
+    Args:
+        memoize: Passed to a newly opened Session.
+        network: Passed to a newly opened Session.
+
+    Yields:
+        The active session. It is closed on exit only if this call opened it.
+    """
+    session = _session_ctx.get()
+    if session is not None:
+        yield session
+        return
+    session = Session(memoize, network)
+    token = _session_ctx.set(session)
+    try:
+        yield session
+    finally:
+        _session_ctx.reset(token)
+        session.close()
+
+
+def get_client() -> AsyncClient:
+    session = _session_ctx.get()
+    if session is None:
+        err = "No active client session. Wrap the call in client_session()."
+        raise RuntimeError(err)
+    return session.client
+
+
+def run[T](coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the active session's event loop."""
+    with client_session() as session, span(f"run {coroutine.__name__}"):
+        return session.run(coroutine)
@@ -0,0 +1,365 @@
+import _thread
+import hashlib
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from collections.abc import Callable, Generator, Mapping, Sequence
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import Any
+
+# Only the standard library is imported here: `forward` runs before any of
+# the CLI is loaded, and it is the whole cost of a command sent to a daemon.
+
+SOCKET_NAME = "jam.sock"
+MAX_MESSAGE = 65536
+# Applied to each forwarded command so output suits the client's terminal.
+CLIENT_ENV = ("TERM", "COLUMNS", "LINES", "NO_COLOR", "FORCE_COLOR")
+CREDENTIAL_ENV = ("JAM_CLIENT_ID", "JAM_CLIENT_SECRET")
+STD_FDS = (0, 1, 2)
+# Seconds to connect to the daemon and hear whether it will run a command.
+HANDSHAKE_TIMEOUT = 2.0
+# Seconds between checks that a client is still waiting for its command.
+WATCH_INTERVAL = 0.1
+# The exit code of a command interrupted by Ctrl-C (128 + SIGINT).
+INTERRUPTED = 130
+
+type Message = dict[str, Any]
+
+
+def socket_path() -> Path:
+    config_path = os.environ.get(
+        "JAM_CONFIG_PATH", str(Path.home() / ".config" / "jam")
+    )
+    return Path(config_path) / SOCKET_NAME
+
+
+def credentials_digest(env: Mapping[str, str]) -> str:
+    digest = hashlib.sha256()
+    for name in CREDENTIAL_ENV:
+        digest.update(env.get(name, "").encode() + b"\0")
+    return digest.hexdigest()
+
+
+def _send(
+    conn: socket.socket,
+    message: Message,
+    fds: Sequence[int] = (),
+) -> None:
+    data = json.dumps(message).encode() + b"\n"
+    if fds:
+        socket.send_fds(conn, [data], fds)
+    else:
+        conn.sendall(data)
+
+
+def _receive(conn: socket.socket, data: bytes = b"") -> Message | None:
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(MAX_MESSAGE)
+        if not chunk:
+            return None
+        data += chunk
+    return json.loads(data)
+
+
+def request(message: Message) -> Message | None:
+    """
+    Send a control message to the daemon.
+
+    Returns:
+        The daemon's reply, or None if no daemon is running.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX) as conn:
+            conn.settimeout(HANDSHAKE_TIMEOUT)
+            conn.connect(str(socket_path()))
+            _send(conn, message)
+            return _receive(conn)
+    except OSError:
+        return None
+
+
+def forward(argv: list[str]) -> int | None:
+    """
+    Run a command in the `jam serve` daemon, if one is running.
+
+    The client's stdin, stdout and stderr are handed to the daemon, which
+    runs the command against them directly, so pipes, TTY detection and
+    prompts behave as they would in-process. A daemon that does not answer
+    promptly, or is busy with another command, leaves the command to this
+    process. Once the command has started, Ctrl-C closes the connection,
+    which interrupts it in the daemon. Set JAM_NO_DAEMON to always run
+    in-process.
+
+    Args:
+        argv: The command line, without the program name.
+
+    Returns:
+        The command's exit code, or None if it should run in this process.
+    """
+    path = socket_path()
+    if (
+        argv[:1] in (["serve"], ["shell"])
+        or os.environ.get("JAM_NO_DAEMON")
+        or not path.exists()
+    ):
+        return None
+    message: Message = {
+        "op": "run",
+        "argv": argv,
+        "cwd": str(Path.cwd()),
+        "env": {k: os.environ[k] for k in CLIENT_ENV if k in os.environ},
+        "working_dir": os.environ.get("JAM_WORKING_DIR"),
+        "credentials": credentials_digest(os.environ),
+    }
+    try:
+        with socket.socket(socket.AF_UNIX) as conn:
+            conn.settimeout(HANDSHAKE_TIMEOUT)
+            conn.connect(str(path))
+            _send(conn, message, STD_FDS)
+            reply = _receive(conn)
+            if reply is None or reply.get("declined"):
+                return None
+            # The command itself may take as long as it needs.
+            conn.settimeout(None)
+            return _result(conn)
+    except OSError:
+        return None
+    except KeyboardInterrupt:
+        return INTERRUPTED
+
+
+def _result(conn: socket.socket) -> int:
+    """Wait for the exit code of a command the daemon has started."""
+    try:
+        reply = _receive(conn)
+    except OSError:
+        reply = None
+    if reply is None:
+        # The command had started, so running it again here could repeat
+        # its changes.
+        print("jam: the daemon exited during the command", file=sys.stderr)  # noqa: T201
+        return 1
+    return reply["code"]
+
+
+@contextmanager
+def _attached(fds: list[int], cwd: str, env: Message) -> Generator[None]:
+    """Point this process's standard streams, cwd and env at a client's."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_fds = [os.dup(fd) for fd in STD_FDS]
+    saved_streams = sys.stdin, sys.stdout, sys.stderr
+    saved_env = {k: os.environ.get(k) for k in CLIENT_ENV}
+    saved_cwd = Path.cwd()
+    for target, fd in zip(STD_FDS, fds, strict=True):
+        os.dup2(fd, target)
+    sys.stdin = os.fdopen(0, "r", closefd=False)
+    sys.stdout = os.fdopen(
+        1, "w", buffering=1 if os.isatty(1) else -1, closefd=False
+    )
+    sys.stderr = os.fdopen(2, "w", buffering=1, closefd=False)
+    for name in CLIENT_ENV:
+        if name in env:
+            os.environ[name] = env[name]
+        else:
+            os.environ.pop(name, None)
+    os.chdir(cwd)
+    try:
+        yield
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            with suppress(OSError):
+                stream.flush()
+        sys.stdin, sys.stdout, sys.stderr = saved_streams
+        for target, fd in zip(STD_FDS, saved_fds, strict=True):
+            os.dup2(fd, target)
+            os.close(fd)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        os.chdir(saved_cwd)
+
+
+class _Job:
+    """A command accepted from a client, to run on the main thread."""
+
+    def __init__(
+        self,
+        conn: socket.socket,
+        message: Message,
+        fds: list[int],
+    ) -> None:
+        self.conn = conn
+        self.message = message
+        self.fds = fds
+        # Guarded by the daemon's lock.
+        self.started = False
+        self.finished = False
+        self.cancelled = False
+        self.replied = threading.Event()
+
+
+class Daemon:
+    """
+    Runs jam commands for clients connecting to a Unix socket.
+
+    Each connection is handled on its own thread, but commands run one at
+    a time on the main thread, which alone receives signals, so the HTTP
+    pool, OAuth token and cache connection stay warm between them. A
+    client is told to run the command itself when another command is
+    running or its credentials differ from the daemon's. If a client
+    disconnects, e.g. on Ctrl-C, its command is interrupted as if by
+    Ctrl-C.
+    """
+
+    def __init__(
+        self, execute: Callable[[list[str], str | None], int]
+    ) -> None:
+        self._execute = execute
+        self._credentials = credentials_digest(os.environ)
+        self._started = time.time()
+        self._served = 0
+        self._jobs: queue.Queue[_Job | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._busy = False
+
+    def serve_forever(self) -> None:
+        path = socket_path()
+        path.unlink(missing_ok=True)
+        with socket.socket(socket.AF_UNIX) as server:
+            server.bind(str(path))
+            path.chmod(0o600)
+            server.listen()
+            threading.Thread(
+                target=self._accept, args=(server,), daemon=True
+            ).start()
+            try:
+                while (job := self._jobs.get()) is not None:
+                    self._run(job)
+            finally:
+                path.unlink(missing_ok=True)
+
+    def _accept(self, server: socket.socket) -> None:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                # The server socket was closed as the daemon stopped.
+                return
+            threading.Thread(
+                target=self._handle, args=(conn,), daemon=True
+            ).start()
+
+    def _handle(self, conn: socket.socket) -> None:
+        fds: list[int] = []
+        try:
+            conn.settimeout(HANDSHAKE_TIMEOUT)
+            data, fds, _, _ = socket.recv_fds(conn, MAX_MESSAGE, len(STD_FDS))
+            message = _receive(conn, data)
+            if message is None:
+                return
+            match message.get("op"):
+                case "run":
+                    self._submit(conn, message, fds)
+                case "status":
+                    _send(conn, self.status())
+                case "stop":
+                    self._jobs.put(None)
+                    _send(conn, {"stopped": True})
+        except OSError:
+            # The client went away; there is no one left to tell.
+            pass
+        finally:
+            conn.close()
+            for fd in fds:
+                os.close(fd)
+
+    def _submit(
+        self,
+        conn: socket.socket,
+        message: Message,
+        fds: list[int],
+    ) -> None:
+        trusted = message.get("credentials") == self._credentials
+        if not trusted or len(fds) != len(STD_FDS):
+            _send(conn, {"declined": True})
+            return
+        with self._lock:
+            busy, self._busy = self._busy, True
+        if busy:
+            _send(conn, {"declined": True, "busy": True})
+            return
+        try:
+            _send(conn, {"accepted": True})
+        except OSError:
+            with self._lock:
+                self._busy = False
+            raise
+        job = _Job(conn, message, fds)
+        self._jobs.put(job)
+        self._watch(job)
+        # The connection and descriptors stay open until the main thread
+        # has finished with them.
+        job.replied.wait()
+
+    def _watch(self, job: _Job) -> None:
+        """Interrupt the job's command if its client disconnects first."""
+        job.conn.settimeout(WATCH_INTERVAL)
+        while True:
+            with self._lock:
+                if job.finished:
+                    return
+            try:
+                if not job.conn.recv(1):
+                    break
+            except TimeoutError:
+                continue
+            except OSError:
+                break
+        with self._lock:
+            if job.started and not job.finished:
+                _thread.interrupt_main()
+            job.cancelled = True
+
+    def _run(self, job: _Job) -> None:
+        with self._lock:
+            job.started = not job.cancelled
+        code = INTERRUPTED
+        try:
+            try:
+                if job.started:
+                    with _attached(
+                        job.fds,
+                        job.message["cwd"],
+                        job.message.get("env", {}),
+                    ):
+                        code = self._execute(
+                            job.message["argv"],
+                            job.message.get("working_dir"),
+                        )
+            finally:
+                with self._lock:
+                    job.finished = True
+                    self._busy = False
+        except KeyboardInterrupt:
+            # Interrupted by _watch after the client disconnected.
+            code = INTERRUPTED
+        if job.started:
+            self._served += 1
+        with suppress(OSError):
+            _send(job.conn, {"code": code})
+        job.replied.set()
+
+    def status(self) -> Message:
+        return {
+            "pid": os.getpid(),
+            "uptime": time.time() - self._started,
+            "served": self._served,
+        }
@@ -0,0 +1,73 @@
+import asyncio
+import fcntl
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Self
+
+
+class FileLock:
+    """
+    An exclusive advisory lock on a file, shared by every jam process.
+
+    Usable as a regular or an async context manager; the async form waits
+    for the lock on a worker thread so the event loop keeps running.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._file: IO[bytes] | None = None
+
+    def acquire(self) -> None:
+        file = Path.open(self._path, "a+b")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX)
+        except BaseException:
+            file.close()
+            raise
+        self._file = file
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+    @property
+    def file(self) -> IO[bytes]:
+        if self._file is None:
+            err = f"{self._path} is not locked"
+            raise RuntimeError(err)
+        return self._file
+
+    def __enter__(self) -> Self:
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.release()
+
+    async def __aenter__(self) -> Self:
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The thread cannot be interrupted; drop the lock once it lands.
+            acquiring.add_done_callback(lambda _: self.release())
+            raise
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.release()
@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import NamedTuple
+
+import httpx
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+# Response bodies kept at most; the least recently used are dropped first.
+MAX_MEMO_BYTES = 64 * 2**20
+
+type MemoKey = tuple[str, str, bytes]
+
+
+class MemoEntry(NamedTuple):
+    expires: float
+    status: int
+    headers: httpx.Headers
+    content: bytes
+
+
+class MemoTransport(httpx.AsyncBaseTransport):
+    """
+    Replays successful reads for up to `ttl` seconds.
+
+    Reads are GETs and POSTs marked SAFE_TO_RETRY, such as searches. Any
+    other request may change data, so it empties the memo. While `enabled`
+    returns False, e.g. during a cache refresh, requests go to the API.
+    Bodies are held up to MAX_MEMO_BYTES in all, least recently used first
+    out.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        enabled: Callable[[], bool],
+        ttl: float,
+    ) -> None:
+        self._transport = transport
+        self._enabled = enabled
+        self._ttl = ttl
+        self._responses: OrderedDict[MemoKey, MemoEntry] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+
+    @staticmethod
+    def _is_read(request: httpx.Request) -> bool:
+        return request.method in READ_METHODS or bool(
+            request.extensions.get("jam_retry"),
+        )
+
+    def _clear(self) -> None:
+        self._responses.clear()
+        self._size = 0
+
+    def _pop(self, key: MemoKey) -> None:
+        self._size -= len(self._responses.pop(key).content)
+
+    def _lookup(self, key: MemoKey) -> MemoEntry | None:
+        entry = self._responses.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic():
+            self._pop(key)
+            return None
+        self._responses.move_to_end(key)
+        return entry
+
+    def _store(self, key: MemoKey, entry: MemoEntry) -> None:
+        if key in self._responses:
+            self._pop(key)
+        if len(entry.content) > MAX_MEMO_BYTES:
+            return
+        self._responses[key] = entry
+        self._size += len(entry.content)
+        while self._size > MAX_MEMO_BYTES:
+            self._pop(next(iter(self._responses)))
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request,
+    ) -> httpx.Response:
+        if not self._is_read(request):
+            self._clear()
+            return await self._transport.handle_async_request(request)
+        key = (request.method, str(request.url), request.content)
+        entry = self._lookup(key) if self._enabled() else None
+        if entry is not None:
+            self.hits += 1
+            return httpx.Response(
+                entry.status,
+                headers=entry.headers,
+                stream=httpx.ByteStream(entry.content),
+                request=request,
+            )
+        response = await self._transport.handle_async_request(request)
+        if not response.is_success or self._ttl <= 0:
+            return response
+        try:
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        self._store(
+            key,
+            MemoEntry(
+                time.monotonic() + self._ttl,
+                response.status_code,
+                response.headers,
+                content,
+            ),
+        )
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(content),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
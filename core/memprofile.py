@@ -0,0 +1,140 @@
+import resource
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from rich.console import Console
+from rich.table import Table
+
+from core.profiling import short_path
+
+# Seconds between checks of the traced memory.
+WATCH_INTERVAL = 0.05
+# Traced memory must grow by this factor before the next snapshot, which
+# keeps the number of (slow) snapshots logarithmic in the peak.
+SNAPSHOT_GROWTH = 1.5
+TOP_SITES = 10
+IGNORED = (
+    tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+    tracemalloc.Filter(inclusive=False, filename_pattern="<frozen *>"),
+    tracemalloc.Filter(inclusive=False, filename_pattern="<unknown>"),
+)
+
+
+def peak_rss() -> int:
+    """Return the process's peak resident set size, in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryProfiler:
+    """
+    Traces the memory a command allocates.
+
+    A watcher thread snapshots the traced allocations each time they grow
+    by half again, so the last snapshot shows the allocation sites close to
+    the peak. Records validated into models are counted by `track_records`
+    along with the memory they retain, giving bytes per record for each
+    model type.
+    """
+
+    def __init__(self) -> None:
+        self.records: Counter[str] = Counter()
+        self.record_bytes: Counter[str] = Counter()
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._snapshot_size = 0
+        self._peak = 0
+        self._done = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+
+    def _watch(self) -> None:
+        while not self._done.wait(WATCH_INTERVAL):
+            current, _ = tracemalloc.get_traced_memory()
+            if current > self._snapshot_size * SNAPSHOT_GROWTH:
+                self._snapshot = tracemalloc.take_snapshot()
+                self._snapshot_size = current
+
+    def start(self) -> None:
+        tracemalloc.start()
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._done.set()
+        self._watcher.join()
+        _, self._peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    def print_report(self) -> None:
+        console = Console(stderr=True)
+        console.print(
+            f"Peak RSS {peak_rss() / 2**20:.0f} MB, peak traced "
+            f"{self._peak / 2**20:.0f} MB",
+        )
+        if self.records:
+            table = Table(title="Memory per record")
+            table.add_column("Model")
+            for column in ("Records", "Bytes/record", "Total MB"):
+                table.add_column(column, justify="right")
+            for name, count in self.records.most_common():
+                total = self.record_bytes[name]
+                table.add_row(
+                    name,
+                    str(count),
+                    f"{total / count:.0f}",
+                    f"{total / 2**20:.1f}",
+                )
+            console.print(table)
+        if self._snapshot is None:
+            return
+        stats = self._snapshot.filter_traces(IGNORED).statistics("lineno")
+        table = Table(
+            title=f"Top allocation sites, at "
+            f"{self._snapshot_size / 2**20:.0f} MB traced",
+        )
+        table.add_column("Site")
+        for column in ("MB", "Blocks"):
+            table.add_column(column, justify="right")
+        for stat in stats[:TOP_SITES]:
+            frame = stat.traceback[0]
+            table.add_row(
+                f"{short_path(frame.filename)}:{frame.lineno}",
+                f"{stat.size / 2**20:.1f}",
+                str(stat.count),
+            )
+        console.print(table)
+
+
+_memprofile_ctx: ContextVar[MemoryProfiler | None] = ContextVar(
+    "memprofile", default=None
+)
+
+
+def start_memprofile() -> MemoryProfiler:
+    profiler = MemoryProfiler()
+    _memprofile_ctx.set(profiler)
+    profiler.start()
+    return profiler
+
+
+@contextmanager
+def track_records(model: str, count: int) -> Generator[None]:
+    """
+    Count records built in the block, and the memory they retain, if
+    memory profiling is on.
+    """
+    profiler = _memprofile_ctx.get()
+    if profiler is None:
+        yield
+        return
+    before, _ = tracemalloc.get_traced_memory()
+    try:
+        yield
+    finally:
+        after, _ = tracemalloc.get_traced_memory()
+        profiler.records[model] += count
+        profiler.record_bytes[model] += after - before
@@ -0,0 +1,117 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from enum import StrEnum
+from typing import Any
+
+import httpx
+
+from core.client import get_client
+from core.progress import add_task, update_task
+from core.settings import get_settings
+from core.timings import phase
+from core.tracing import span
+
+SETTINGS = get_settings()
+
+type Params = list[tuple[str, str | int | float | None]]
+type Page = list[dict[str, Any]]
+
+
+class TotalCount(StrEnum):
+    """Where an endpoint reports the size of the full result set."""
+
+    # v1 endpoints: {"totalCount": n, "results": [...]}
+    BODY = "body"
+    # v2 endpoints: a bare JSON list plus an x-total-count header
+    HEADER = "header"
+
+
+def _read_page(
+    response: httpx.Response,
+    total_count: TotalCount,
+) -> tuple[Page, int]:
+    response.raise_for_status()
+    with phase("decode"):
+        body = response.json()
+    if total_count is TotalCount.HEADER:
+        return body, int(response.headers.get("x-total-count", 0))
+    return body.get("results") or [], body.get("totalCount", 0)
+
+
+async def _fetch(
+    endpoint: str,
+    params: Params,
+    skip: int,
+    total_count: TotalCount,
+) -> tuple[Page, int]:
+    page_params = [*params, ("skip", skip)]
+    with span("page", **{"jam.endpoint": endpoint, "jam.skip": skip}):
+        response = await get_client().get(endpoint, params=page_params)
+        return _read_page(response, total_count)
+
+
+async def paginate(
+    endpoint: str,
+    params: Params,
+    total_count: TotalCount,
+    description: str,
+    *,
+    ordered: bool = True,
+) -> AsyncGenerator[Page]:
+    """
+    Yield every page of a skip/limit paginated endpoint.
+
+    The first page is fetched alone to learn the total, then the remaining
+    pages are fetched concurrently through a window of `max_concurrency`
+    requests, so memory stays bounded however large the result set is.
+    Closing the generator early (e.g. via `contextlib.aclosing`) cancels
+    any pages still in flight.
+
+    Args:
+        endpoint: The API path to page through.
+        params: Query parameters sent with every page. `skip` is added.
+        total_count: Where the endpoint reports the total result count.
+        description: Progress bar label shown while fetching.
+        ordered: Yield pages in skip order, or as soon as each completes.
+
+    Yields:
+        The raw results of each page.
+    """
+    limit = next((int(v) for k, v in params if k == "limit"), SETTINGS.limit)
+    first, total = await _fetch(endpoint, params, 0, total_count)
+    yield first
+    if not first or len(first) >= total:
+        return
+    task_id = add_task(description, total=total, completed=len(first))
+    skips = iter(range(limit, total, limit))
+    window = max(1, SETTINGS.max_concurrency)
+    pending: list[asyncio.Task[tuple[Page, int]]] = []
+
+    def schedule() -> None:
+        for skip in skips:
+            coroutine = _fetch(endpoint, params, skip, total_count)
+            pending.append(asyncio.ensure_future(coroutine))
+            if len(pending) >= window:
+                return
+
+    try:
+        schedule()
+        while pending:
+            if ordered:
+                task = pending.pop(0)
+                page, _ = await task
+            else:
+                done, _ = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                task = done.pop()
+                pending.remove(task)
+                page, _ = task.result()
+            schedule()
+            update_task(task_id, advance=len(page))
+            yield page
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
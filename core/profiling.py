@@ -0,0 +1,96 @@
+import cProfile
+import signal
+import sysconfig
+import threading
+from collections import Counter
+from pathlib import Path
+from types import CodeType, FrameType
+
+from core.config import PROJECT_ROOT
+
+# Seconds of CPU time between stack samples.
+SAMPLE_INTERVAL = 0.001
+SITE_PACKAGES = "site-packages/"
+STDLIB = sysconfig.get_paths()["stdlib"]
+
+
+def short_path(filename: str) -> str:
+    """Shorten a source path to one relative to its package root."""
+    if SITE_PACKAGES in filename:
+        return filename.rsplit(SITE_PACKAGES, 1)[1]
+    if filename.startswith(str(PROJECT_ROOT)):
+        return str(Path(filename).relative_to(PROJECT_ROOT))
+    if filename.startswith(STDLIB):
+        return str(Path(filename).relative_to(STDLIB))
+    return filename
+
+
+def _location(code: CodeType) -> str:
+    path = short_path(code.co_filename)
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """
+    Profiles the rest of a command, including its event loop.
+
+    cProfile records every call, for pstats. Its call graph only links
+    callers to callees, so the stacks for flame graphs are sampled instead:
+    every millisecond of CPU time, the main thread's stack is counted.
+    Sampling needs `signal.setitimer`, which Windows lacks, and the main
+    thread, which alone handles signals.
+    """
+
+    def __init__(self) -> None:
+        self._profile = cProfile.Profile()
+        self._stacks: Counter[tuple[CodeType, ...]] = Counter()
+        self._sampling = (
+            hasattr(signal, "setitimer")
+            and threading.current_thread() is threading.main_thread()
+        )
+
+    def _sample(self, _: int, frame: FrameType | None) -> None:
+        stack = []
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        self._stacks[tuple(reversed(stack))] += 1
+
+    def start(self) -> None:
+        if self._sampling:
+            signal.signal(signal.SIGPROF, self._sample)
+            signal.setitimer(
+                signal.ITIMER_PROF, SAMPLE_INTERVAL, SAMPLE_INTERVAL
+            )
+        self._profile.enable()
+
+    def stop(self) -> None:
+        self._profile.disable()
+        if self._sampling:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def write(self, path: Path) -> list[Path]:
+        """
+        Write pstats to `path` and collapsed stacks to `path.collapsed`.
+
+        The collapsed stacks, one `caller;callee count` line per distinct
+        stack, can be read by flamegraph.pl, speedscope or inferno.
+
+        Returns:
+            The files written.
+        """
+        self._profile.dump_stats(path)
+        if not self._sampling:
+            return [path]
+        collapsed = path.with_name(f"{path.name}.collapsed")
+        labels: dict[CodeType, str] = {}
+        with collapsed.open("w") as file:
+            for stack, count in self._stacks.most_common():
+                frames = [
+                    labels.get(code)
+                    or labels.setdefault(code, _location(code))
+                    for code in stack
+                ]
+                file.write(f"{';'.join(frames)} {count}\n")
+        return [path, collapsed]
@@ -0,0 +1,136 @@
+import re
+from typing import Any
+
+# JSON paths are inlined into the SQL so they match the expression indexes;
+# anything that is not a plain dotted field name is left to the server.
+FIELD_PATTERN = re.compile(
+    r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$"
+)
+# Keeps `filter=` query strings well inside common proxy and server URL limits.
+MAX_FILTER_LENGTH = 2000
+COMPARISONS = {
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+}
+
+
+class UnsupportedFilterError(ValueError):
+    """Raised when a filter can only be evaluated by the JumpCloud API."""
+
+
+def field_expression(field: str) -> str:
+    if not FIELD_PATTERN.match(field):
+        err = f"Unsupported filter field: {field}"
+        raise UnsupportedFilterError(err)
+    return f"json_extract(data, '$.{field}')"
+
+
+def _coerce(value: str) -> str | int | float:
+    match value:
+        case "true":
+            return 1
+        case "false":
+            return 0
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def compile_filter(expression: str) -> tuple[str, list[Any]]:
+    """
+    Compile a JumpCloud `field:$op:value` filter into a SQL condition.
+
+    Both v1 (`$eq`) and v2 (`eq`) operator spellings are accepted. Values
+    are compared both as text and as the JSON type they look like, since
+    the API accepts `active:$eq:true` for a boolean field.
+
+    Args:
+        expression: A single filter, e.g. 'department:$eq:Engineering'.
+
+    Returns:
+        The SQL condition and its parameters.
+
+    Raises:
+        UnsupportedFilterError: If the filter cannot be evaluated locally.
+    """
+    try:
+        field, op, value = expression.split(":", 2)
+    except ValueError as e:
+        err = f"Malformed filter: {expression}"
+        raise UnsupportedFilterError(err) from e
+    column = field_expression(field)
+    op = op.removeprefix("$")
+    if op == "eq":
+        return f"{column} IN (?, ?)", [value, _coerce(value)]
+    if op == "ne":
+        clause = f"{column} IS NULL OR {column} NOT IN (?, ?)"
+        return clause, [value, _coerce(value)]
+    if op in COMPARISONS:
+        number = _coerce(value)
+        if isinstance(number, str):
+            bound, params = "?", [value]
+        else:
+            # SQLite ranks all text above numbers, so text fields get the text.
+            bound = f"CASE typeof({column}) WHEN 'text' THEN ? ELSE ? END"
+            params = [value, number]
+        return f"{column} {COMPARISONS[op]} {bound}", params
+    if op == "in":
+        values = value.split("|")
+        placeholders = ", ".join("?" for _ in values)
+        return f"{column} IN ({placeholders})", values
+    # Unlike LIKE, these match case-sensitively, as the API does.
+    if op == "sw":
+        return f"substr({column}, 1, ?) = ?", [len(value), value]
+    if op == "ew":
+        clause = f"substr({column}, length({column}) - ? + 1) = ?"
+        return clause, [len(value), value]
+    err = f"Unsupported filter operator: {op}"
+    raise UnsupportedFilterError(err)
+
+
+def compile_filters(filters: list[str]) -> tuple[str, list[Any]]:
+    """Compile filters into one SQL condition that requires all of them."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    for expression in filters:
+        clause, clause_params = compile_filter(expression)
+        clauses.append(f"({clause})")
+        params.extend(clause_params)
+    return " AND ".join(clauses) or "1", params
+
+
+def in_filters(field: str, values: list[str], batch_size: int) -> list[str]:
+    """
+    Split values into `field:$in:a|b|c` filters that fit in a request URL.
+
+    Args:
+        field: The field to match, e.g. '_id'.
+        values: The values to match.
+        batch_size: The most values to put in one filter.
+
+    Returns:
+        Filters that together match every value.
+    """
+    prefix = f"{field}:$in:"
+    filters: list[str] = []
+    batch: list[str] = []
+    length = len(prefix)
+    for value in values:
+        if batch and (
+            len(batch) >= batch_size
+            or length + len(value) + 1 > MAX_FILTER_LENGTH
+        ):
+            filters.append(prefix + "|".join(batch))
+            batch, length = [], len(prefix)
+        batch.append(value)
+        length += len(value) + 1
+    if batch:
+        filters.append(prefix + "|".join(batch))
+    return filters
@@ -0,0 +1,100 @@
+import asyncio
+import random
+
+import httpx
+
+from core.scheduler import parse_delay
+from core.timings import request_timing
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+# Pass as `extensions=` to mark a POST that is safe to repeat, e.g. a search.
+SAFE_TO_RETRY = {"jam_retry": True}
+TRANSIENT_ERRORS = (
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError,
+)
+
+
+class RetryBudget:
+    """Counts the retries spent by a session against a fixed allowance."""
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.used = 0
+
+    def spend(self) -> bool:
+        if self.used >= self.total:
+            return False
+        self.used += 1
+        return True
+
+    def reset(self) -> None:
+        self.used = 0
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Retries idempotent requests that fail with a transient error.
+
+    Timeouts, dropped connections and 5xx responses are retried with
+    exponential backoff and full jitter, up to `max_retries` per request and
+    the session's RetryBudget overall.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        budget: RetryBudget,
+        max_retries: int,
+        backoff: float,
+        max_backoff: float,
+    ) -> None:
+        self._transport = transport
+        self._budget = budget
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+
+    def _can_retry(self, request: httpx.Request, attempt: int) -> bool:
+        retryable = request.method in IDEMPOTENT_METHODS or bool(
+            request.extensions.get("jam_retry"),
+        )
+        return (
+            retryable and attempt < self._max_retries and self._budget.spend()
+        )
+
+    def _delay(self, attempt: int, response: httpx.Response | None) -> float:
+        if response is not None:
+            retry_after = parse_delay(response.headers.get("retry-after"))
+            if retry_after is not None:
+                return retry_after
+        ceiling = min(self._max_backoff, self._backoff * 2**attempt)
+        return random.uniform(0, ceiling)  # noqa: S311
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request,
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except TRANSIENT_ERRORS:
+                if not self._can_retry(request, attempt):
+                    raise
+                response = None
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                if not self._can_retry(request, attempt):
+                    return response
+                await response.aclose()
+            await asyncio.sleep(self._delay(attempt, response))
+            if (timing := request_timing(request)) is not None:
+                timing.retries += 1
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -0,0 +1,194 @@
+import asyncio
+import struct
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+import httpx
+
+from core.locking import FileLock
+from core.timings import request_timing
+
+TOO_MANY_REQUESTS = 429
+# Reset headers above this are epoch timestamps rather than second counts.
+EPOCH_THRESHOLD = 1_000_000_000
+
+
+def parse_delay(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(tz=UTC)).total_seconds())
+    if seconds > EPOCH_THRESHOLD:
+        return max(0.0, seconds - time.time())
+    return max(0.0, seconds)
+
+
+class SharedRateLimit:
+    """
+    A token bucket stored in a file, shared by every jam process.
+
+    Each request takes one token under a file lock. Tokens refill at `rate`
+    per second up to a burst of one second's worth, so parallel jam
+    invocations on one machine stay under the limit together.
+    """
+
+    STATE = struct.Struct("dd")
+
+    def __init__(self, path: Path, rate: float) -> None:
+        self._path = path
+        self._rate = rate
+        self._burst = max(1.0, rate)
+
+    def _take(self) -> float:
+        # Called from worker threads, so each call takes its own lock.
+        with FileLock(self._path) as lock:
+            file = lock.file
+            file.seek(0)
+            state = file.read(self.STATE.size)
+            now = time.time()
+            if len(state) == self.STATE.size:
+                tokens, stamp = self.STATE.unpack(state)
+                tokens = min(
+                    self._burst,
+                    tokens + max(0.0, now - stamp) * self._rate,
+                )
+            else:
+                tokens = self._burst
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self._rate
+            file.seek(0)
+            file.truncate()
+            file.write(self.STATE.pack(tokens, now))
+            file.flush()
+        return wait
+
+    async def acquire(self) -> None:
+        while (wait := await asyncio.to_thread(self._take)) > 0:  # noqa: ASYNC110
+            await asyncio.sleep(wait)
+
+
+class RequestScheduler:
+    """
+    Caps in-flight requests and pauses all of them while the API throttles.
+
+    Every request waits for a free slot, then for any pause requested by a
+    429 response or an exhausted rate-limit window to elapse, then for the
+    machine-wide SharedRateLimit if one is configured.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_throttle_retries: int,
+        throttle_backoff: float,
+        shared_limit: SharedRateLimit | None = None,
+    ) -> None:
+        self.max_throttle_retries = max_throttle_retries
+        self._throttle_backoff = throttle_backoff
+        self._shared_limit = shared_limit
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._resume_at = 0.0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncGenerator[None]:
+        async with self._semaphore:
+            # A pause can be extended by another response while we sleep.
+            while (delay := self._resume_at - time.monotonic()) > 0:  # noqa: ASYNC110
+                await asyncio.sleep(delay)
+            if self._shared_limit is not None:
+                await self._shared_limit.acquire()
+            yield
+
+    def pause(self, seconds: float) -> None:
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def observe(self, response: httpx.Response, attempt: int) -> None:
+        """
+        Record any throttling signalled by a response.
+
+        Args:
+            response: The response to inspect.
+            attempt: How many times this request has already been throttled.
+        """
+        headers = response.headers
+        reset = parse_delay(headers.get("x-ratelimit-reset"))
+        if response.status_code == TOO_MANY_REQUESTS:
+            delay = parse_delay(headers.get("retry-after"))
+            if delay is None:
+                delay = reset
+            if delay is None:
+                delay = self._throttle_backoff * 2**attempt
+            self.pause(delay)
+        elif headers.get("x-ratelimit-remaining") == "0" and reset:
+            self.pause(reset)
+
+
+class SchedulingTransport(httpx.AsyncBaseTransport):
+    """
+    Routes every request through a RequestScheduler.
+
+    Response bodies are read while the slot is held, so the concurrency cap
+    covers the whole download and not just the response headers.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        scheduler: RequestScheduler,
+    ) -> None:
+        self._transport = transport
+        self._scheduler = scheduler
+
+    async def _send(self, request: httpx.Request) -> httpx.Response:
+        timing = request_timing(request)
+        queued = time.perf_counter()
+        async with self._scheduler.slot():
+            if timing is not None:
+                timing.queue_wait += time.perf_counter() - queued
+            response = await self._transport.handle_async_request(request)
+            try:
+                content = b"".join([chunk async for chunk in response.stream])
+            finally:
+                await response.aclose()
+        if timing is not None:
+            timing.bytes += len(content)
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=httpx.ByteStream(content),
+            extensions=response.extensions,
+            request=request,
+        )
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request,
+    ) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = await self._send(request)
+            self._scheduler.observe(response, attempt)
+            if (
+                response.status_code != TOO_MANY_REQUESTS
+                or attempt >= self._scheduler.max_throttle_retries
+            ):
+                return response
+            if (timing := request_timing(request)) is not None:
+                timing.throttled += 1
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -1,4 +1,3 @@
-import json
 import os
 from functools import lru_cache
 from pathlib import Path
@@ -8,25 +7,27 @@ from pydantic import Field
 from pydantic_settings import (
     BaseSettings,
     DotEnvSettingsSource,
-    JsonConfigSettingsSource,
+    InitSettingsSource,
     PydanticBaseSettingsSource,
     PyprojectTomlConfigSettingsSource,
     SettingsConfigDict,
 )
 
-from core.config import init_config
+from core.config import load_config
 
 
-class JamConfigSource(JsonConfigSettingsSource):
-    def __init__(self, settings_cls: type[BaseSettings]) -> None:
-        config_path = init_config()
-        with Path.open(config_path) as f:
-            json_data = json.load(f)
-        self._jam_config: dict[str, Any] = json_data.get("jam", {})
-        super().__init__(settings_cls, config_path)
+def _config_dir() -> Path:
+    return Path(
+        os.environ.get("JAM_CONFIG_PATH", str(Path.home() / ".config" / "jam"))
+    )
+
 
-    def __call__(self) -> dict[str, Any]:
-        return self._jam_config
+class JamConfigSource(InitSettingsSource):
+    """The "jam" table of config.json, read and parsed once."""
+
+    def __init__(self, settings_cls: type[BaseSettings]) -> None:
+        jam_config: dict[str, Any] = load_config().get("jam", {})
+        super().__init__(settings_cls, jam_config)
 
 
 class Settings(BaseSettings):
@@ -45,8 +46,33 @@ class Settings(BaseSettings):
         default="https://admin-oauth.id.jumpcloud.com/oauth2/token"
     )
     timeout: int = Field(default=10)
+    token_refresh_margin: int = Field(default=300)
+    max_connections: int = Field(default=20)
+    max_keepalive_connections: int = Field(default=10)
+    keepalive_expiry: float = Field(default=30.0)
+    max_concurrency: int = Field(default=10)
+    max_throttle_retries: int = Field(default=5)
+    throttle_backoff: float = Field(default=1.0)
+    shared_rate_limit: float = Field(default=0.0)
+    max_retries: int = Field(default=3)
+    retry_backoff: float = Field(default=0.5)
+    retry_max_backoff: float = Field(default=10.0)
+    retry_budget: int = Field(default=100)
     limit: int = Field(default=100)
     local_tz: str = Field(default="US/Eastern")
+    cache_enabled: bool = Field(default=True)
+    cache_ttl: dict[str, int] = Field(
+        default_factory=lambda: {
+            "users": 900,
+            "systems": 900,
+            "groups": 3600,
+            "applications": 3600,
+        }
+    )
+    cache_full_sync_interval: int = Field(default=86400)
+    full_listing_threshold: float = Field(default=0.5)
+    compact_results: bool = Field(default=True)
+    shell_memo_ttl: int = Field(default=30)
     console_user_fields: dict[str, str] = Field(default_factory=dict)
     csv_user_fields: dict[str, str] = Field(default_factory=dict)
     console_system_fields: dict[str, str] = Field(default_factory=dict)
@@ -75,14 +101,9 @@ class Settings(BaseSettings):
         dotenv_settings: PydanticBaseSettingsSource,  # noqa: ARG003
         file_secret_settings: PydanticBaseSettingsSource,  # noqa: ARG003
     ) -> tuple[PydanticBaseSettingsSource, ...]:
-        config_path = Path(
-            os.environ.get(
-                "JAM_CONFIG_PATH", str(Path.home() / ".config" / "jam")
-            )
-        )
         custom_dotenv = DotEnvSettingsSource(
             settings_cls,
-            env_file=config_path / ".env",
+            env_file=_config_dir() / ".env",
         )
         return (
             init_settings,
@@ -0,0 +1,783 @@
+import asyncio
+import http
+import json
+import operator
+import random
+import re
+from collections.abc import AsyncIterator, Callable, Generator, Iterator
+from contextlib import contextmanager
+from typing import Any, Self
+from urllib.parse import parse_qsl
+
+import httpx
+from pydantic import BaseModel
+
+type Record = dict[str, Any]
+
+USER_PREFIX = "5a"
+SYSTEM_PREFIX = "5b"
+GROUP_PREFIX = "5c"
+APPLICATION_PREFIX = "5d"
+OS_NAMES = (
+    ("Mac OS X", "darwin"),
+    ("Windows", "windows"),
+    ("Ubuntu", "linux"),
+)
+DEPARTMENTS = ("Engineering", "Sales", "Finance", "Support", "Marketing")
+EMPLOYEE_TYPES = ("Full Time", "Full Time", "Full Time", "Contractor")
+OPERATORS: dict[str, Callable[[str, str], bool]] = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda actual, values: actual in values.split("|"),
+    "sw": str.startswith,
+    "ew": str.endswith,
+}
+OK = 200
+NO_CONTENT = 204
+NOT_FOUND = 404
+TOO_MANY_REQUESTS = 429
+TOKEN_LIFETIME = 3600
+# Set per hop by the HTTP server rather than copied from the response.
+HOP_HEADERS = frozenset({"connection", "content-length", "transfer-encoding"})
+
+
+def object_id(prefix: str, index: int) -> str:
+    return f"{prefix}{index:022x}"
+
+
+def _index(prefix: str, record_id: str) -> int | None:
+    if len(record_id) != 24 or not record_id.startswith(prefix):  # noqa: PLR2004
+        return None
+    try:
+        return int(record_id[len(prefix) :], 16)
+    except ValueError:
+        return None
+
+
+def _timestamp(index: int) -> str:
+    return f"2025-{index % 12 + 1:02d}-{index % 28 + 1:02d}T12:00:00.000Z"
+
+
+def user_record(index: int) -> Record:
+    return {
+        "_id": object_id(USER_PREFIX, index),
+        "account_locked": False,
+        "activated": True,
+        "allow_public_key": True,
+        "costCenter": f"CC-{index % 40:03d}",
+        "created": _timestamp(index),
+        "department": DEPARTMENTS[index % len(DEPARTMENTS)],
+        "disableDeviceMaxLoginAttempts": False,
+        "displayname": f"User {index}",
+        "email": f"user{index}@example.com",
+        "employeeType": EMPLOYEE_TYPES[index % len(EMPLOYEE_TYPES)],
+        "enable_user_portal_multifactor": True,
+        "externally_managed": False,
+        "firstname": "User",
+        "jobTitle": f"Title {index % 25}",
+        "lastname": str(index),
+        "ldap_binding_user": False,
+        "mfa": {"configured": True, "exclusion": False},
+        "mfaEnrollment": {
+            "overallStatus": "ENROLLED",
+            "pushStatus": "ENROLLED",
+            "totpStatus": "NOT_ENROLLED",
+            "webAuthnStatus": "NOT_ENROLLED",
+        },
+        "password_date": _timestamp(index + 7),
+        "password_expired": False,
+        "password_never_expires": False,
+        "passwordless_sudo": False,
+        "samba_service_user": False,
+        "state": "SUSPENDED" if index % 50 == 0 else "ACTIVATED",
+        "sudo": False,
+        "suspended": index % 50 == 0,
+        "totp_enabled": False,
+        "username": f"user{index}",
+    }
+
+
+def system_record(index: int) -> Record:
+    os_name, os_family = OS_NAMES[index % len(OS_NAMES)]
+    return {
+        "_id": object_id(SYSTEM_PREFIX, index),
+        "active": index % 10 != 0,
+        "agentVersion": "1.190.0",
+        "arch": "arm64",
+        "created": _timestamp(index),
+        "displayName": f"host-{index}",
+        "fde": {"active": True, "keyPresent": True},
+        "hostname": f"host-{index}.example.com",
+        "lastContact": _timestamp(index + 3),
+        "mdm": {
+            "dep": True,
+            "enrollmentType": "automated",
+            "internal": {"deviceId": f"device-{index}"},
+            "vendor": "internal",
+        },
+        "networkInterfaces": [
+            {
+                "address": f"10.{index // 65536 % 256}.{index // 256 % 256}."
+                f"{index % 256}",
+                "family": "IPv4",
+                "internal": False,
+                "name": name,
+            }
+            for name in ("en0", "en1", "lo0", "utun0")
+        ],
+        "organization": "5f0000000000000000000000",
+        "os": os_name,
+        "osFamily": os_family,
+        "osVersionDetail": {
+            "major": "15",
+            "majorNumber": 15,
+            "minor": "3",
+            "minorNumber": 3,
+            "osName": os_name,
+            "patch": "1",
+            "patchNumber": 1,
+            "version": "15.3.1",
+        },
+        "policyStats": {
+            "duplicate": 0,
+            "failed": index % 3,
+            "pending": 0,
+            "success": 12,
+            "total": 12 + index % 3,
+            "unsupportedOs": 0,
+        },
+        "serialNumber": f"SN{index:010d}",
+        "sshdParams": [
+            {"name": name, "value": "no"}
+            for name in ("PermitRootLogin", "PasswordAuthentication")
+        ],
+        "userMetrics": [
+            {
+                "admin": False,
+                "managed": True,
+                "secureTokenEnabled": True,
+                "suspended": False,
+                "userName": f"user{index}",
+            },
+        ],
+        "version": "15.3.1",
+    }
+
+
+def group_record(index: int) -> Record:
+    return {
+        "id": object_id(GROUP_PREFIX, index),
+        "name": f"group-{index}",
+        "type": "user_group",
+        "description": f"Generated group {index}",
+    }
+
+
+def application_record(index: int) -> Record:
+    return {
+        "_id": object_id(APPLICATION_PREFIX, index),
+        "id": object_id(APPLICATION_PREFIX, index),
+        "active": index % 5 != 0,
+        "displayLabel": f"App {index}",
+        "name": f"app-{index}",
+        "ssoUrl": f"https://sso.example.com/app-{index}",
+    }
+
+
+class Tenant(BaseModel):
+    """The size of a generated JumpCloud organization."""
+
+    users: int
+    systems: int
+    groups: int = 0
+    group_size: int = 100
+    applications: int = 0
+
+    @classmethod
+    def of_size(cls, size: int) -> Self:
+        """A tenant with `size` users and systems, in groups of 100."""
+        return cls(
+            users=size,
+            systems=size,
+            groups=max(1, size // 100),
+            applications=max(1, size // 1000),
+        )
+
+
+class Faults(BaseModel):
+    """How a FakeJumpCloud misbehaves, as a real tenant under load might."""
+
+    # Seconds added to every response, plus up to `jitter` more at random.
+    latency: float = 0.0
+    jitter: float = 0.0
+    # The share of requests answered 429, asking to wait `retry_after`.
+    rate_limit: float = 0.0
+    retry_after: float = 1.0
+    # The share of requests that start a burst of `error_burst` 5xx
+    # responses in a row.
+    error_rate: float = 0.0
+    error_burst: int = 1
+    error_status: int = 503
+    # Send bodies `drip_bytes` at a time, `drip_delay` seconds apart.
+    drip_bytes: int = 0
+    drip_delay: float = 0.0
+    # Makes the faults repeatable from run to run.
+    seed: int | None = None
+
+
+class DripStream(httpx.AsyncByteStream):
+    """A response body sent a few bytes at a time."""
+
+    def __init__(self, content: bytes, size: int, delay: float) -> None:
+        self._content = content
+        self._size = size
+        self._delay = delay
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        for start in range(0, len(self._content), self._size):
+            if start:
+                await asyncio.sleep(self._delay)
+            yield self._content[start : start + self._size]
+
+
+def _text(value: Any) -> str:  # noqa: ANN401
+    # Filter values are compared as the JSON text of the field.
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _matches(record: Record, filters: list[str]) -> bool:
+    for spec in filters:
+        field, op, value = spec.split(":", 2)
+        # v2 filters read field:op:value, without the $.
+        compare = OPERATORS.get(op.removeprefix("$"))
+        if compare and not compare(_text(record.get(field)), value):
+            return False
+    return True
+
+
+def _json(body: Any, headers: dict[str, str] | None = None) -> httpx.Response:  # noqa: ANN401
+    return httpx.Response(
+        OK,
+        content=json.dumps(body),
+        headers={"Content-Type": "application/json", **(headers or {})},
+    )
+
+
+def _association(target: str, record_id: str) -> Record:
+    return {"to": {"id": record_id, "type": target}, "attributes": None}
+
+
+class FakeJumpCloud(httpx.AsyncBaseTransport):
+    """
+    Answers JumpCloud API requests from a generated tenant.
+
+    Records are generated from their index on demand rather than stored, so
+    a tenant of 100k users costs no memory in the process it serves. It
+    understands skip/limit paging in both the v1 and v2 styles, v1 and v2
+    filters, field selection, searches, associations, group membership
+    changes and the OAuth token endpoint, which is what jam uses. Faults
+    such as latency, rate limiting and 5xx bursts are injected as set, and
+    counts of requests, response bytes and injected faults are kept for
+    reporting.
+    """
+
+    def __init__(self, tenant: Tenant, faults: Faults | None = None) -> None:
+        self.tenant = tenant
+        self.faults = faults or Faults()
+        self.requests = 0
+        self.response_bytes = 0
+        self.throttled = 0
+        self.errors = 0
+        self._random = random.Random(self.faults.seed)  # noqa: S311
+        self._burst = 0
+        self._added: dict[int, set[int]] = {}
+        self._user_edits: dict[int, Record] = {}
+        self._routes: list[tuple[str, re.Pattern[str], Callable[..., Any]]] = [
+            ("POST", re.compile(r"/oauth2/token"), self._issue_token),
+            ("GET", re.compile(r"/systemusers"), self._list_users),
+            ("GET", re.compile(r"/systemusers/(\w+)"), self._get_user),
+            ("POST", re.compile(r"/search/systemusers"), self._find_users),
+            (
+                "GET",
+                re.compile(r"/v2/users/(\w+)/systems"),
+                self._user_systems,
+            ),
+            ("GET", re.compile(r"/systems"), self._list_systems),
+            ("GET", re.compile(r"/systems/(\w+)"), self._get_system),
+            ("POST", re.compile(r"/search/systems"), self._find_systems),
+            (
+                "GET",
+                re.compile(r"/v2/systems/(\w+)/associations"),
+                self._system_users,
+            ),
+            ("GET", re.compile(r"/v2/systems/(\w+)/fdekey"), self._fde_key),
+            ("GET", re.compile(r"/v2/usergroups"), self._list_groups),
+            ("GET", re.compile(r"/v2/usergroups/(\w+)"), self._get_group),
+            (
+                "GET",
+                re.compile(r"/v2/usergroups/(\w+)/members"),
+                self._list_members,
+            ),
+            (
+                "POST",
+                re.compile(r"/v2/usergroups/(\w+)/members"),
+                self._change_member,
+            ),
+            ("GET", re.compile(r"/applications"), self._list_applications),
+            (
+                "GET",
+                re.compile(r"/v2/applications/(\w+)/associations"),
+                self._application_groups,
+            ),
+        ]
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request,
+    ) -> httpx.Response:
+        self.requests += 1
+        await request.aread()
+        faults = self.faults
+        if faults.latency or faults.jitter:
+            delay = faults.latency + self._random.uniform(0, faults.jitter)
+            await asyncio.sleep(delay)
+        path = request.url.path.removeprefix("/api")
+        # Token requests are not retried by jam, so they never fail here.
+        response = None if path == "/oauth2/token" else self._fault()
+        if response is None:
+            response = self._route(request, path)
+        self.response_bytes += len(response.content)
+        if faults.drip_bytes and response.content:
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=DripStream(
+                    response.content, faults.drip_bytes, faults.drip_delay
+                ),
+            )
+        return response
+
+    def _fault(self) -> httpx.Response | None:
+        """Return an injected 429 or 5xx response, if one is due."""
+        faults = self.faults
+        if self._random.random() < faults.rate_limit:
+            self.throttled += 1
+            return httpx.Response(
+                TOO_MANY_REQUESTS,
+                json={"message": "Too Many Requests"},
+                headers={"Retry-After": str(faults.retry_after)},
+            )
+        if not self._burst and self._random.random() < faults.error_rate:
+            self._burst = faults.error_burst
+        if self._burst:
+            self._burst -= 1
+            self.errors += 1
+            return httpx.Response(
+                faults.error_status,
+                json={"message": "Simulated server error"},
+            )
+        return None
+
+    def _route(self, request: httpx.Request, path: str) -> httpx.Response:
+        params = parse_qsl(request.url.query.decode(), keep_blank_values=True)
+        for method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if method == request.method and match:
+                return handler(request, params, *match.groups())
+        return httpx.Response(NOT_FOUND, json={"message": "Not Found"})
+
+    def edit_user(self, index: int, **fields: Any) -> None:  # noqa: ANN401
+        """Change fields of a user, as an admin might in the console."""
+        self._user_edits.setdefault(index, {}).update(fields)
+
+    def _user(self, index: int) -> Record:
+        record = user_record(index)
+        edits = self._user_edits.get(index)
+        return record | edits if edits else record
+
+    @staticmethod
+    def _page(
+        params: list[tuple[str, str]],
+    ) -> tuple[int, int, list[str], list[str] | None]:
+        values = dict(params)
+        filters = [v for k, v in params if k.startswith("filter")]
+        fields = values["fields"].split() if "fields" in values else None
+        return (
+            int(values.get("skip", 0)),
+            int(values.get("limit", 10)),
+            filters,
+            fields,
+        )
+
+    @staticmethod
+    def _select(
+        generate: Callable[[int], Record],
+        prefix: str,
+        count: int,
+        filters: list[str],
+    ) -> Iterator[Record]:
+        """Yield the records matching the filters, in ID order."""
+        for spec in filters:
+            # ID lookups are answered without generating the whole tenant.
+            if spec.startswith("_id:$in:"):
+                ids = spec.removeprefix("_id:$in:").split("|")
+                indexes = sorted(
+                    i
+                    for i in (_index(prefix, record_id) for record_id in ids)
+                    if i is not None and i < count
+                )
+                rest = [f for f in filters if f != spec]
+                records = (generate(i) for i in indexes)
+                return (r for r in records if _matches(r, rest))
+        records = (generate(i) for i in range(count))
+        return (r for r in records if not filters or _matches(r, filters))
+
+    def _v1_list(
+        self,
+        params: list[tuple[str, str]],
+        generate: Callable[[int], Record],
+        prefix: str,
+        count: int,
+    ) -> httpx.Response:
+        skip, limit, filters, fields = self._page(params)
+        if filters:
+            matching = list(self._select(generate, prefix, count, filters))
+            total, page = len(matching), matching[skip : skip + limit]
+        else:
+            total = count
+            page = [generate(i) for i in range(skip, min(skip + limit, count))]
+        if fields is not None:
+            keep = {"_id", *fields}
+            page = [{k: v for k, v in r.items() if k in keep} for r in page]
+        return _json({"totalCount": total, "results": page})
+
+    def _v2_list(
+        self,
+        params: list[tuple[str, str]],
+        records: list[Record],
+    ) -> httpx.Response:
+        skip, limit, filters, _ = self._page(params)
+        matching = [r for r in records if _matches(r, filters)]
+        return _json(
+            matching[skip : skip + limit],
+            headers={"x-total-count": str(len(matching))},
+        )
+
+    def _search(
+        self,
+        request: httpx.Request,
+        params: list[tuple[str, str]],
+        generate: Callable[[int], Record],
+        count: int,
+    ) -> httpx.Response:
+        skip, limit, _, _ = self._page(params)
+        search = json.loads(request.content or "{}").get("searchFilter", {})
+        term = str(search.get("searchTerm", "")).lower()
+        fields = search.get("fields", [])
+        matching = [
+            record
+            for record in map(generate, range(count))
+            if any(term in str(record.get(f, "")).lower() for f in fields)
+        ]
+        return _json(
+            {
+                "totalCount": len(matching),
+                "results": matching[skip : skip + limit],
+            },
+        )
+
+    @staticmethod
+    def _record(record: Record | None) -> httpx.Response:
+        if record is None:
+            return httpx.Response(NOT_FOUND, json={"message": "Not Found"})
+        return _json(record)
+
+    def _lookup(
+        self,
+        generate: Callable[[int], Record],
+        prefix: str,
+        count: int,
+        record_id: str,
+    ) -> Record | None:
+        index = _index(prefix, record_id)
+        if index is None or index >= count:
+            return None
+        return generate(index)
+
+    @staticmethod
+    def _issue_token(
+        _: httpx.Request, __: list[tuple[str, str]]
+    ) -> httpx.Response:
+        return _json(
+            {
+                "access_token": "simulated",
+                "expires_in": TOKEN_LIFETIME,
+                "scope": "api",
+                "token_type": "bearer",
+            },
+        )
+
+    def _list_users(
+        self, _: httpx.Request, params: list[tuple[str, str]]
+    ) -> httpx.Response:
+        return self._v1_list(
+            params, self._user, USER_PREFIX, self.tenant.users
+        )
+
+    def _get_user(
+        self, _: httpx.Request, __: list[tuple[str, str]], user_id: str
+    ) -> httpx.Response:
+        return self._record(
+            self._lookup(self._user, USER_PREFIX, self.tenant.users, user_id)
+        )
+
+    def _find_users(
+        self, request: httpx.Request, params: list[tuple[str, str]]
+    ) -> httpx.Response:
+        return self._search(request, params, self._user, self.tenant.users)
+
+    def _user_systems(
+        self, _: httpx.Request, __: list[tuple[str, str]], user_id: str
+    ) -> httpx.Response:
+        # User n is bound to system n, where there is one.
+        user = _index(USER_PREFIX, user_id)
+        if user is None or user >= self.tenant.users:
+            return self._record(None)
+        systems = [user] if user < self.tenant.systems else []
+        return _json(
+            [
+                {"id": object_id(SYSTEM_PREFIX, i), "type": "system"}
+                for i in systems
+            ],
+        )
+
+    def _list_systems(
+        self, _: httpx.Request, params: list[tuple[str, str]]
+    ) -> httpx.Response:
+        return self._v1_list(
+            params, system_record, SYSTEM_PREFIX, self.tenant.systems
+        )
+
+    def _get_system(
+        self, _: httpx.Request, __: list[tuple[str, str]], system_id: str
+    ) -> httpx.Response:
+        return self._record(
+            self._lookup(
+                system_record, SYSTEM_PREFIX, self.tenant.systems, system_id
+            )
+        )
+
+    def _find_systems(
+        self, request: httpx.Request, params: list[tuple[str, str]]
+    ) -> httpx.Response:
+        return self._search(
+            request, params, system_record, self.tenant.systems
+        )
+
+    def _system_users(
+        self, _: httpx.Request, __: list[tuple[str, str]], system_id: str
+    ) -> httpx.Response:
+        system = _index(SYSTEM_PREFIX, system_id)
+        if system is None or system >= self.tenant.systems:
+            return self._record(None)
+        users = [system] if system < self.tenant.users else []
+        return _json(
+            [_association("user", object_id(USER_PREFIX, i)) for i in users],
+        )
+
+    def _fde_key(
+        self, _: httpx.Request, __: list[tuple[str, str]], system_id: str
+    ) -> httpx.Response:
+        system = _index(SYSTEM_PREFIX, system_id)
+        if system is None or system >= self.tenant.systems:
+            return self._record(None)
+        return _json({"key": f"{system:04d}-SIMU-LATE-DKEY-0000-0000"})
+
+    def _list_groups(
+        self, _: httpx.Request, params: list[tuple[str, str]]
+    ) -> httpx.Response:
+        groups = [group_record(i) for i in range(self.tenant.groups)]
+        return self._v2_list(params, groups)
+
+    def _get_group(
+        self, _: httpx.Request, __: list[tuple[str, str]], group_id: str
+    ) -> httpx.Response:
+        return self._record(
+            self._lookup(
+                group_record, GROUP_PREFIX, self.tenant.groups, group_id
+            )
+        )
+
+    def _members(self, group: int) -> list[int]:
+        if not self.tenant.users:
+            return []
+        start = group * self.tenant.group_size
+        members = [
+            (start + i) % self.tenant.users
+            for i in range(min(self.tenant.group_size, self.tenant.users))
+        ]
+        added = self._added.get(group, set()) - set(members)
+        return members + sorted(added)
+
+    def _list_members(
+        self, _: httpx.Request, params: list[tuple[str, str]], group_id: str
+    ) -> httpx.Response:
+        group = _index(GROUP_PREFIX, group_id)
+        if group is None or group >= self.tenant.groups:
+            return self._record(None)
+        members = [
+            _association("user", object_id(USER_PREFIX, user))
+            for user in self._members(group)
+        ]
+        return self._v2_list(params, members)
+
+    def _change_member(
+        self, request: httpx.Request, _: list[tuple[str, str]], group_id: str
+    ) -> httpx.Response:
+        body = json.loads(request.content)
+        group = _index(GROUP_PREFIX, group_id)
+        user = _index(USER_PREFIX, body.get("id", ""))
+        if group is None or user is None:
+            return self._record(None)
+        added = self._added.setdefault(group, set())
+        if body.get("op") == "remove":
+            added.discard(user)
+        else:
+            added.add(user)
+        return httpx.Response(NO_CONTENT)
+
+    def _list_applications(
+        self, _: httpx.Request, params: list[tuple[str, str]]
+    ) -> httpx.Response:
+        return self._v1_list(
+            params,
+            application_record,
+            APPLICATION_PREFIX,
+            self.tenant.applications,
+        )
+
+    def _application_groups(
+        self, _: httpx.Request, params: list[tuple[str, str]], app_id: str
+    ) -> httpx.Response:
+        # Application n is assigned every group whose index is n modulo
+        # the number of applications.
+        app = _index(APPLICATION_PREFIX, app_id)
+        if app is None or app >= self.tenant.applications:
+            return self._record(None)
+        groups = range(app, self.tenant.groups, self.tenant.applications)
+        return self._v2_list(
+            [(k, v) for k, v in params if k != "targets"],
+            [
+                _association("user_group", object_id(GROUP_PREFIX, i))
+                for i in groups
+            ],
+        )
+
+
+@contextmanager
+def simulated_session(
+    tenant: Tenant,
+    faults: Faults | None = None,
+) -> Generator[FakeJumpCloud]:
+    """
+    Open a client session whose requests a FakeJumpCloud answers.
+
+    Suits a test fixture, e.g.:
+
+        @pytest.fixture
+        def jumpcloud():
+            with simulated_session(Tenant.of_size(1000)) as fake:
+                yield fake
+
+    Yields:
+        The simulated JumpCloud, for its counters and faults.
+    """
+    # Imported here: the simulator alone does not load jam's settings.
+    from core.client import client_session  # noqa: PLC0415
+
+    jumpcloud = FakeJumpCloud(tenant, faults)
+    with client_session(network=jumpcloud):
+        yield jumpcloud
+
+
+async def _read_request(reader: asyncio.StreamReader) -> httpx.Request | None:
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers: list[tuple[str, str]] = []
+    while (header := await reader.readline()) not in {b"\r\n", b"\n", b""}:
+        name, _, value = header.decode("latin-1").partition(":")
+        headers.append((name.strip(), value.strip()))
+    length = next(
+        (int(v) for k, v in headers if k.lower() == "content-length"), 0
+    )
+    content = await reader.readexactly(length)
+    return httpx.Request(
+        method, f"http://simulator{target}", headers=headers, content=content
+    )
+
+
+async def _write_response(
+    writer: asyncio.StreamWriter,
+    response: httpx.Response,
+) -> None:
+    status = http.HTTPStatus(response.status_code)
+    headers = [
+        (k, v) for k, v in response.headers.items() if k not in HOP_HEADERS
+    ]
+    # Dripped bodies are sent chunk by chunk as the simulator yields them.
+    chunked = isinstance(response.stream, DripStream)
+    content = b""
+    if chunked:
+        headers.append(("transfer-encoding", "chunked"))
+    elif status is not http.HTTPStatus.NO_CONTENT:
+        content = await response.aread()
+        headers.append(("content-length", str(len(content))))
+    head = f"HTTP/1.1 {status.value} {status.phrase}\r\n" + "".join(
+        f"{k}: {v}\r\n" for k, v in headers
+    )
+    writer.write(head.encode("latin-1") + b"\r\n" + content)
+    if chunked:
+        async for chunk in response.aiter_raw():
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def serve(jumpcloud: FakeJumpCloud, host: str, port: int) -> None:
+    """
+    Serve a FakeJumpCloud over HTTP/1.1 until cancelled.
+
+    Both the API, under /api, and the OAuth token endpoint are served, so
+    any jam process can be pointed at it through its `api_url` and
+    `oauth_url` settings.
+    """
+
+    async def handle(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        try:
+            while (request := await _read_request(reader)) is not None:
+                response = await jumpcloud.handle_async_request(request)
+                await _write_response(writer, response)
+                if request.headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,261 @@
+import json
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+import httpx
+from pydantic import BaseModel
+from rich.console import Console
+from rich.table import Table
+
+from core.tracing import SpanKind, is_tracing, span
+
+# Phases timed outside the HTTP requests themselves.
+PHASES = ("token", "decode", "validate", "render")
+PERCENTILES = (50, 95, 99)
+OBJECT_ID = re.compile(r"/[0-9a-f]{24}(?=/|$)")
+
+
+class RequestTiming(BaseModel):
+    """One API request, including any retries it took."""
+
+    method: str
+    endpoint: str
+    # Seconds since timings started.
+    started: float
+    status: int | None = None
+    error: str | None = None
+    latency: float = 0.0
+    # Seconds spent waiting for a scheduler slot or a throttling pause.
+    queue_wait: float = 0.0
+    # Response bytes received, across every attempt.
+    bytes: int = 0
+    retries: int = 0
+    throttled: int = 0
+
+
+def _new_timing(request: httpx.Request, started: float) -> RequestTiming:
+    return RequestTiming(
+        method=request.method,
+        endpoint=OBJECT_ID.sub("/{id}", request.url.path),
+        started=started,
+    )
+
+
+def percentile(values: list[float], percent: int) -> float:
+    """Return the nearest-rank percentile of `values`, or 0 if empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(0, rank - 1)]
+
+
+def _distribution(values: list[float]) -> dict[str, float]:
+    return {f"p{p}": percentile(values, p) for p in PERCENTILES} | {
+        "max": max(values, default=0.0),
+    }
+
+
+class Timings:
+    """
+    Collects request and phase timings for one command.
+
+    Requests are recorded by TimingTransport and phases by `phase`, both of
+    which do nothing unless timings were started for the current context.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self.requests: list[RequestTiming] = []
+        self.phases: dict[str, float] = defaultdict(float)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def begin(self, request: httpx.Request) -> RequestTiming:
+        timing = _new_timing(request, self.elapsed())
+        self.requests.append(timing)
+        return timing
+
+    def summary(self) -> dict[str, Any]:
+        """Return totals and latency percentiles, overall and by endpoint."""
+        wall = self.elapsed()
+        endpoints: dict[str, list[RequestTiming]] = defaultdict(list)
+        for timing in self.requests:
+            endpoints[f"{timing.method} {timing.endpoint}"].append(timing)
+        return {
+            "wall_seconds": wall,
+            "requests": len(self.requests),
+            "requests_per_second": len(self.requests) / wall if wall else 0,
+            "bytes": sum(t.bytes for t in self.requests),
+            "statuses": dict(
+                Counter(str(t.status or t.error) for t in self.requests),
+            ),
+            "retries": sum(t.retries for t in self.requests),
+            "throttled": sum(t.throttled for t in self.requests),
+            "latency": _distribution([t.latency for t in self.requests]),
+            "queue_wait": _distribution([t.queue_wait for t in self.requests]),
+            "phases": {name: self.phases.get(name, 0.0) for name in PHASES},
+            "endpoints": {
+                name: {
+                    "requests": len(timings),
+                    "bytes": sum(t.bytes for t in timings),
+                    "retries": sum(t.retries for t in timings),
+                    "latency": _distribution([t.latency for t in timings]),
+                }
+                for name, timings in endpoints.items()
+            },
+        }
+
+    def print_summary(self) -> None:
+        summary = self.summary()
+        console = Console(stderr=True)
+        table = Table(title="Request timings")
+        table.add_column("Endpoint")
+        for column in ("Requests", "KB", "Retries", "p50", "p95", "p99"):
+            table.add_column(column, justify="right")
+        for name, endpoint in summary["endpoints"].items():
+            latency = endpoint["latency"]
+            table.add_row(
+                name,
+                str(endpoint["requests"]),
+                f"{endpoint['bytes'] / 1024:.0f}",
+                str(endpoint["retries"]),
+                *(f"{latency[f'p{p}'] * 1000:.0f}ms" for p in PERCENTILES),
+            )
+        console.print(table)
+        latency, wait = summary["latency"], summary["queue_wait"]
+        statuses = ", ".join(
+            f"{status}: {count}"
+            for status, count in sorted(summary["statuses"].items())
+        )
+        console.print(
+            f"{summary['requests']} request(s) in "
+            f"{summary['wall_seconds']:.2f}s "
+            f"({summary['requests_per_second']:.1f}/s), "
+            f"{summary['bytes'] / 2**20:.1f} MB, "
+            f"{summary['retries']} retried, "
+            f"{summary['throttled']} throttled"
+            + (f" [{statuses}]" if statuses else ""),
+        )
+        console.print(
+            "Latency "
+            + " ".join(f"p{p} {latency[f'p{p}']:.3f}s" for p in PERCENTILES)
+            + ", queue wait "
+            + " ".join(f"p{p} {wait[f'p{p}']:.3f}s" for p in PERCENTILES),
+        )
+        console.print(
+            "Phases "
+            + ", ".join(
+                f"{name} {seconds:.3f}s"
+                for name, seconds in summary["phases"].items()
+            ),
+        )
+
+    def write_json(self, path: Path) -> None:
+        data = {
+            "summary": self.summary(),
+            "requests": [t.model_dump() for t in self.requests],
+        }
+        path.write_text(json.dumps(data, indent=2))
+
+
+_timings_ctx: ContextVar[Timings | None] = ContextVar("timings", default=None)
+
+
+def start_timings() -> Timings:
+    timings = Timings()
+    _timings_ctx.set(timings)
+    return timings
+
+
+def get_timings() -> Timings | None:
+    return _timings_ctx.get()
+
+
+@contextmanager
+def phase(name: str) -> Generator[None]:
+    """
+    Add the time spent in the block to a phase, if timings are on, and
+    trace it as a span, if tracing is.
+    """
+    timings = _timings_ctx.get()
+    start = time.perf_counter()
+    try:
+        with span(name):
+            yield
+    finally:
+        if timings is not None:
+            timings.phases[name] += time.perf_counter() - start
+
+
+def _span_attributes(timing: RequestTiming) -> dict[str, str | int | float]:
+    # OpenTelemetry's HTTP semantic conventions, plus jam's own.
+    return {
+        "http.request.method": timing.method,
+        "url.path": timing.endpoint,
+        "http.response.body.size": timing.bytes,
+        "jam.queue_wait": timing.queue_wait,
+        "jam.retries": timing.retries,
+        "jam.throttled": timing.throttled,
+    }
+
+
+def request_timing(request: httpx.Request) -> RequestTiming | None:
+    """Return the timing being recorded for a request, if any."""
+    return request.extensions.get("jam_timing")
+
+
+class TimingTransport(httpx.AsyncBaseTransport):
+    """
+    Records the latency, size and outcome of each request, while timings or
+    tracing are on.
+
+    The transports it wraps add the retries, throttling and queue wait
+    they cause to the request's RequestTiming, found via `request_timing`.
+    When tracing, each request is also a client span carrying the same.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self._transport = transport
+
+    async def handle_async_request(
+        self,
+        request: httpx.Request,
+    ) -> httpx.Response:
+        timings = _timings_ctx.get()
+        if timings is None and not is_tracing():
+            return await self._transport.handle_async_request(request)
+        if timings is None:
+            timing = _new_timing(request, 0.0)
+        else:
+            timing = timings.begin(request)
+        request.extensions["jam_timing"] = timing
+        name = f"{timing.method} {timing.endpoint}"
+        with span(name, SpanKind.CLIENT) as current:
+            start = time.perf_counter()
+            try:
+                response = await self._transport.handle_async_request(request)
+            except Exception as e:
+                timing.error = type(e).__name__
+                raise
+            finally:
+                timing.latency = time.perf_counter() - start
+                if current is not None:
+                    current.attributes.update(_span_attributes(timing))
+            timing.status = response.status_code
+            if current is not None:
+                current.attributes["http.response.status_code"] = (
+                    response.status_code
+                )
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
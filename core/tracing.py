@@ -0,0 +1,158 @@
+import json
+import os
+import secrets
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+type Attributes = dict[str, str | int | float | bool]
+
+# OTLP status codes.
+STATUS_ERROR = 2
+
+
+class SpanKind(IntEnum):
+    """OTLP span kinds."""
+
+    INTERNAL = 1
+    CLIENT = 3
+
+
+class Span(BaseModel):
+    name: str
+    kind: SpanKind
+    span_id: str
+    parent_span_id: str | None
+    start_time: int
+    end_time: int = 0
+    attributes: Attributes = {}
+    error: str | None = None
+
+
+def _otlp_value(value: str | float | bool) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON carries 64-bit integers as strings.
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Attributes) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+    ]
+
+
+class Tracer:
+    """
+    Collects the spans of one command into a single trace.
+
+    Spans are exported together when the command finishes, as one line of
+    OTLP/JSON (an ExportTraceServiceRequest), which is the format the
+    OpenTelemetry Collector's file exporter writes and its otlpjsonfile
+    receiver reads, so a trace file can be replayed into Jaeger, Zipkin or
+    any other OTLP backend.
+    """
+
+    def __init__(self) -> None:
+        self.trace_id = secrets.token_hex(16)
+        self.spans: list[Span] = []
+
+    def _otlp_span(self, span: Span) -> dict[str, Any]:
+        otlp: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_span_id or "",
+            "name": span.name,
+            "kind": int(span.kind),
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": _otlp_attributes(span.attributes),
+        }
+        if span.error is not None:
+            otlp["status"] = {"code": STATUS_ERROR, "message": span.error}
+        return otlp
+
+    def export(self, path: Path) -> None:
+        """Append the trace to a JSONL file."""
+        resource = {"service.name": "jam", "process.pid": os.getpid()}
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes(resource)},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "jam"},
+                            "spans": [self._otlp_span(s) for s in self.spans],
+                        },
+                    ],
+                },
+            ],
+        }
+        with path.open("a") as file:
+            file.write(json.dumps(request) + "\n")
+
+
+_tracer_ctx: ContextVar[Tracer | None] = ContextVar("tracer", default=None)
+_span_ctx: ContextVar[Span | None] = ContextVar("span", default=None)
+
+
+def start_tracing() -> Tracer:
+    tracer = Tracer()
+    _tracer_ctx.set(tracer)
+    return tracer
+
+
+def is_tracing() -> bool:
+    return _tracer_ctx.get() is not None
+
+
+@contextmanager
+def span(
+    name: str,
+    kind: SpanKind = SpanKind.INTERNAL,
+    **attributes: str | float | bool,
+) -> Generator[Span | None]:
+    """
+    Record the block as a span, a child of the span it runs within.
+
+    Does nothing unless tracing was started for the current context. Tasks
+    inherit the span current when they were created, so requests fetched
+    concurrently are children of the span that scheduled them.
+
+    Yields:
+        The span, to add attributes to, or None if tracing is off.
+    """
+    tracer = _tracer_ctx.get()
+    if tracer is None:
+        yield None
+        return
+    parent = _span_ctx.get()
+    current = Span(
+        name=name,
+        kind=kind,
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent.span_id if parent else None,
+        start_time=time.time_ns(),
+        attributes=attributes,
+    )
+    token = _span_ctx.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.end_time = time.time_ns()
+        _span_ctx.reset(token)
+        tracer.spans.append(current)
@@ -6,7 +6,6 @@ REPO="JustinGianelloni/jam"
 INSTALL_DIR="${JAM_INSTALL_DIR:-$HOME/.local/share/jam}"
 CONFIG_PATH="${JAM_CONFIG_PATH:-$HOME/.config/jam}"
 CONFIG_FILE="$CONFIG_PATH/config.json"
-CONFIG_URL="https://raw.githubusercontent.com/${REPO}/main/default_config.json"
 
 use_op=0
 shell_rc="${ZDOTDIR:-$HOME}/.zshrc"
@@ -188,13 +187,13 @@ else
   download_release "$latest_version"
 fi
 
-# Create config directory and download default config
+# Create config directory and copy the bundled default config
 mkdir -p "$CONFIG_PATH"
 if [[ ! -f "$CONFIG_FILE" ]]; then
-  echo "Downloading default configuration..."
-  curl -fsSL "$CONFIG_URL" -o "$CONFIG_FILE"
+  echo "Creating default configuration..."
+  cp "$INSTALL_DIR/default_config.json" "$CONFIG_FILE"
 else
-  echo "Config file already exists, skipping download."
+  echo "Config file already exists, skipping."
   backfill_config
 fi
 
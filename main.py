@@ -1,33 +1,17 @@
-import importlib
-from pathlib import Path
+import sys
 
-import typer
-
-from cli.config import app as config_app
-
-
-def discover_modules() -> list[str]:
-    cli_path = Path(__file__).parent / "cli"
-    modules = [
-        item.name
-        for item in cli_path.iterdir()
-        if item.is_dir()
-        and not item.name.startswith("_")
-        and (item / "commands.py").exists()
-    ]
-    return sorted(modules)
+from core.daemon import forward
 
 
 def main() -> None:
-    app = typer.Typer(
-        help="JumpCloud CLI - \
-        Manage JumpCloud resources from the command line",
-    )
-    for module in discover_modules():
-        cmd = importlib.import_module(f"cli.{module}.commands")
-        app.add_typer(cmd.app, name=module)
-    app.add_typer(config_app, name="config")
-    app()
+    # Hand the command to a running `jam serve` daemon when there is one,
+    # before paying for any of the CLI's own imports.
+    code = forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+    from cli.app import create_app  # noqa: PLC0415
+
+    create_app()()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,79 @@
+from collections import namedtuple
+from collections.abc import Iterator, Sequence
+from functools import lru_cache
+from typing import Any
+
+from pydantic import BaseModel
+
+from core.memprofile import track_records
+from core.timings import phase
+from models.projection import Record, partial_model, type_adapter
+
+
+@lru_cache
+def _row_class(model: type[BaseModel], names: tuple[str, ...]) -> type:
+    """
+    A named tuple of the given fields, with `model`'s display properties.
+
+    Only properties whose SOURCE_FIELDS are all among the fields are copied.
+    """
+    sources: dict[str, tuple[str, ...]] = getattr(model, "SOURCE_FIELDS", {})
+    properties = {
+        name: getattr(model, name)
+        for name, fields in sources.items()
+        if set(fields) <= set(names)
+    }
+    base = namedtuple(f"{model.__name__}Row", names)  # noqa: PYI024
+    return type(base.__name__, (base,), {"__slots__": (), **properties})
+
+
+class Columns[M: BaseModel]:
+    """
+    Listing results held as one list per field rather than one model each.
+
+    Only the projected fields are kept, each validated a page at a time
+    with the field's own TypeAdapter, and repeated strings such as OS
+    names or departments are stored once. Iterating yields lightweight
+    rows that expose the fields, and the model's display properties, as
+    attributes, so presenters and CSV exports can read them like models.
+    """
+
+    def __init__(self, model: type[M], fields: Sequence[str]) -> None:
+        """
+        Args:
+            model: The model the records would otherwise be built as.
+            fields: The API field names to keep, e.g. from `api_fields`.
+        """
+        partial = partial_model(model)
+        names = {
+            info.alias or name: name
+            for name, info in partial.model_fields.items()
+        }
+        self._fields = list(fields)
+        self._adapters = [
+            type_adapter(list[partial.model_fields[names[f]].annotation])
+            for f in self._fields
+        ]
+        self._columns: list[list[Any]] = [[] for _ in self._fields]
+        self._strings: dict[str, str] = {}
+        self._row = _row_class(model, tuple(names[f] for f in self._fields))
+
+    def extend(self, page: list[Record]) -> None:
+        with phase("validate"), track_records(self._row.__name__, len(page)):
+            for field, adapter, column in zip(
+                self._fields, self._adapters, self._columns, strict=True
+            ):
+                values = adapter.validate_python([r.get(field) for r in page])
+                column.extend(
+                    self._strings.setdefault(v, v) if isinstance(v, str) else v
+                    for v in values
+                )
+
+    def __len__(self) -> int:
+        return len(self._columns[0]) if self._columns else 0
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self._row._make, zip(*self._columns, strict=True))
+
+    def __getitem__(self, index: int) -> Any:  # noqa: ANN401
+        return self._row._make(column[index] for column in self._columns)
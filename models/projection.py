@@ -0,0 +1,232 @@
+from collections.abc import Iterable, Sequence
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, get_args
+
+from pydantic import (
+    BaseModel,
+    PrivateAttr,
+    SerializerFunctionWrapHandler,
+    TypeAdapter,
+    create_model,
+    model_serializer,
+)
+from pydantic.fields import FieldInfo
+
+from core.memprofile import track_records
+from core.timings import phase
+
+type Record = dict[str, Any]
+
+_strict_ctx: ContextVar[bool] = ContextVar("strict", default=False)
+
+
+def set_strict(strict: bool) -> None:
+    _strict_ctx.set(strict)
+
+
+def is_strict() -> bool:
+    return _strict_ctx.get()
+
+
+def api_fields(
+    model: type[BaseModel],
+    attributes: Iterable[str],
+) -> list[str] | None:
+    """
+    Map model attributes to the API fields they are read from.
+
+    Properties declare the fields they are computed from in the model's
+    `SOURCE_FIELDS`. The ID is always included.
+
+    Args:
+        model: The model the attributes belong to.
+        attributes: Attribute names, e.g. from a console or CSV mapping.
+
+    Returns:
+        The API field names, or None if an attribute cannot be traced to a
+        field, in which case the full record is needed.
+    """
+    sources: dict[str, tuple[str, ...]] = getattr(model, "SOURCE_FIELDS", {})
+    names = ["id"]
+    for attribute in attributes:
+        if attribute in model.model_fields:
+            names.append(attribute)
+        elif attribute in sources:
+            names.extend(sources[attribute])
+        else:
+            return None
+    fields = model.model_fields
+    return list(dict.fromkeys(fields[name].alias or name for name in names))
+
+
+@lru_cache
+def partial_model[M: BaseModel](model: type[M]) -> type[M]:
+    """Return a subclass of `model` in which every field is optional."""
+    overrides: dict[str, Any] = {
+        name: (
+            info.annotation | None,
+            FieldInfo.merge_field_infos(info, default=None),
+        )
+        for name, info in model.model_fields.items()
+        if info.is_required()
+    }
+    return create_model(
+        f"Partial{model.__name__}",
+        __base__=model,
+        **overrides,
+    )
+
+
+@lru_cache
+def type_adapter(annotation: Any) -> TypeAdapter[Any]:  # noqa: ANN401
+    return TypeAdapter(annotation)
+
+
+def _has_model(annotation: Any) -> bool:  # noqa: ANN401
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+    return any(_has_model(arg) for arg in get_args(annotation))
+
+
+class LazyFields(BaseModel):
+    """
+    Validates fields holding sub-models the first time they are read.
+
+    Until then their raw values wait in `_pending`, absent from the
+    instance's `__dict__` so that reading them falls through to
+    `__getattr__`. Serializing resolves them all first.
+    """
+
+    _pending: Record = PrivateAttr(default_factory=dict)
+
+    def __getattr__(self, name: str) -> Any:  # noqa: ANN401
+        private = self.__pydantic_private__
+        if private and name in private["_pending"]:
+            info = type(self).model_fields[name]
+            value = type_adapter(info.annotation).validate_python(
+                private["_pending"].pop(name),
+            )
+            self.__dict__[name] = value
+            return value
+        return super().__getattr__(name)
+
+    @model_serializer(mode="wrap")
+    def _resolve_pending(
+        self,
+        handler: SerializerFunctionWrapHandler,
+    ) -> Any:  # noqa: ANN401
+        pending = self.__pydantic_private__["_pending"]
+        if pending:
+            for name in list(pending):
+                getattr(self, name)
+            # Fields are serialized in `__dict__` order, which resolving
+            # them out of turn has changed.
+            values = {
+                name: self.__dict__[name] for name in type(self).model_fields
+            }
+            self.__dict__.clear()
+            self.__dict__.update(values)
+        return handler(self)
+
+
+@lru_cache
+def lazy_model[M: BaseModel](model: type[M]) -> type[M]:
+    """Return a partial `model` that validates sub-models on access."""
+    return create_model(
+        f"Lazy{model.__name__}",
+        __base__=(partial_model(model), LazyFields),
+    )
+
+
+@lru_cache
+def _deferred_fields(model: type[BaseModel]) -> dict[str, str]:
+    """Map the names of fields holding sub-models to their API names."""
+    return {
+        name: info.alias or name
+        for name, info in model.model_fields.items()
+        if _has_model(info.annotation)
+    }
+
+
+def _trim(page: list[Record], fields: Sequence[str] | None) -> list[Record]:
+    if fields is None:
+        return page
+    return [{f: record[f] for f in fields if f in record} for record in page]
+
+
+def project_page[M: BaseModel](
+    model: type[M],
+    page: list[Record],
+    fields: Sequence[str] | None,
+) -> list[M]:
+    """
+    Build models from a page of API records.
+
+    The page is validated in one call to a cached TypeAdapter. Unless
+    strict validation is on, the records are trusted: fields the model
+    requires may be missing, and sub-models such as a system's MDM details
+    or network interfaces are only validated if they are read, so listing
+    IDs or a few columns skips most of the work.
+
+    Args:
+        model: The model to build.
+        page: The raw records, which may hold more fields than requested.
+        fields: The API field names to keep, or None for all of them.
+
+    Returns:
+        The models, with fields that were not requested left unset.
+
+    Raises:
+        ValidationError: In strict mode, if a record does not match.
+    """
+    with phase("validate"), track_records(model.__name__, len(page)):
+        return _validate_page(model, page, fields)
+
+
+def project_ids(model: type[BaseModel], page: list[Record]) -> list[str]:
+    """
+    Read the IDs from a page of API records.
+
+    Unless strict validation is on, the IDs are taken from the records as
+    they are, since nothing else is read from them.
+
+    Raises:
+        ValidationError: In strict mode, if a record does not match.
+    """
+    info = model.model_fields["id"]
+    if is_strict():
+        page = project_page(model, page, [info.alias or "id"])
+        return [record.id for record in page]
+    return [record[info.alias or "id"] for record in page]
+
+
+def _validate_page[M: BaseModel](
+    model: type[M],
+    page: list[Record],
+    fields: Sequence[str] | None,
+) -> list[M]:
+    records = _trim(page, fields)
+    if is_strict():
+        target = model if fields is None else partial_model(model)
+        return type_adapter(list[target]).validate_python(records)
+    deferred = {
+        name: alias
+        for name, alias in _deferred_fields(model).items()
+        if fields is None or alias in fields
+    }
+    if not deferred:
+        # Nothing to defer, e.g. for IDs only.
+        return type_adapter(list[partial_model(model)]).validate_python(
+            records
+        )
+    aliases = set(deferred.values())
+    models = type_adapter(list[lazy_model(model)]).validate_python(
+        [{k: v for k, v in r.items() if k not in aliases} for r in records],
+    )
+    for instance, record in zip(models, records, strict=True):
+        pending = {n: record[a] for n, a in deferred.items() if a in record}
+        for name in pending:
+            del instance.__dict__[name]
+        instance.__pydantic_private__["_pending"] = pending
+    return models
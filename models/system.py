@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import ClassVar
 
 import pytz
 from pydantic import BaseModel, Field
@@ -249,6 +250,13 @@ class System(BaseModel):
     )
     version: str | None = None
 
+    # The fields each display property is computed from.
+    SOURCE_FIELDS: ClassVar[dict[str, tuple[str, ...]]] = {
+        "pretty_last_contact": ("last_contact",),
+        "pretty_os": ("os",),
+        "pretty_os_family": ("os_family",),
+    }
+
     @property
     def pretty_last_contact(self) -> str:
         tz = pytz.timezone(SETTINGS.local_tz)
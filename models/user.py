@@ -1,5 +1,6 @@
 from datetime import datetime
 from enum import StrEnum
+from typing import ClassVar
 
 from pydantic import BaseModel, Field
 
@@ -165,6 +166,11 @@ class User(BaseModel):
     unix_uid: int | None = None
     username: str | None = None
 
+    # The fields each display property is computed from.
+    SOURCE_FIELDS: ClassVar[dict[str, tuple[str, ...]]] = {
+        "pretty_state": ("state",),
+    }
+
     @property
     def pretty_state(self) -> str:
         match self.state:
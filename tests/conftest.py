@@ -0,0 +1,36 @@
+import os
+import tempfile
+from collections.abc import Generator
+
+import httpx
+import pytest
+
+# jam loads its settings and opens its cache from here when first imported.
+os.environ["JAM_CONFIG_PATH"] = tempfile.mkdtemp(prefix="jam-tests-")
+
+from core.simulator import FakeJumpCloud, Tenant, simulated_session
+
+TENANT_SIZE = 500
+
+
+@pytest.fixture
+def jumpcloud() -> Generator[FakeJumpCloud]:
+    with simulated_session(Tenant.of_size(TENANT_SIZE)) as fake:
+        yield fake
+
+
+@pytest.fixture
+def requests(
+    jumpcloud: FakeJumpCloud,
+    monkeypatch: pytest.MonkeyPatch,
+) -> list[httpx.Request]:
+    """The requests the simulated JumpCloud answers, in order."""
+    seen: list[httpx.Request] = []
+    route = jumpcloud._route
+
+    def recording(request: httpx.Request, path: str) -> httpx.Response:
+        seen.append(request)
+        return route(request, path)
+
+    monkeypatch.setattr(jumpcloud, "_route", recording)
+    return seen
@@ -0,0 +1,112 @@
+import time
+from contextvars import copy_context
+
+import httpx
+
+from api import users as usr_api
+from core.cache import (
+    CLOCK_SKEW,
+    CacheMode,
+    Resource,
+    get_cache,
+    set_cache_mode,
+    sync_delta,
+)
+from core.client import run
+from core.simulator import USER_PREFIX, FakeJumpCloud, object_id
+from tests.conftest import TENANT_SIZE
+
+
+def _cache_users() -> None:
+    def listing() -> None:
+        set_cache_mode(CacheMode.REBUILD)
+        run(usr_api.list_users())
+
+    copy_context().run(listing)
+
+
+def _job_title(user_id: str) -> str | None:
+    def listing() -> str | None:
+        set_cache_mode(CacheMode.ON)
+        users = run(usr_api.list_users([f"_id:$eq:{user_id}"]))
+        return users[0].job_title
+
+    return copy_context().run(listing)
+
+
+def _age(resource: Resource, seconds: float) -> None:
+    """Make the snapshot look `seconds` older than it is."""
+    with get_cache()._conn as conn:
+        conn.execute(
+            "UPDATE snapshots SET refreshed_at = refreshed_at - ?, "
+            "synced_at = synced_at - ? WHERE resource = ?",
+            (seconds, seconds, resource),
+        )
+
+
+def _sync_users() -> set[str]:
+    cache = get_cache()
+    copy_context().run(run, sync_delta(cache, Resource.USERS, usr_api.DELTA))
+    return cache.ids(Resource.USERS)
+
+
+def _id_listings(requests: list[httpx.Request]) -> int:
+    return sum(
+        1
+        for request in requests
+        if request.url.params.get("fields") == "_id"
+        and request.url.params.get("limit") != "1"
+    )
+
+
+def test_sync_finds_deleted_records(
+    jumpcloud: FakeJumpCloud,
+    requests: list[httpx.Request],
+) -> None:
+    _cache_users()
+    synced = len(requests)
+    jumpcloud.tenant.users = TENANT_SIZE - 10
+    ids = _sync_users()
+    remaining = {object_id(USER_PREFIX, i) for i in range(TENANT_SIZE - 10)}
+    assert ids == remaining
+    assert _id_listings(requests[synced:]) > 0
+
+
+def test_sync_skips_id_listing_when_counts_match(
+    jumpcloud: FakeJumpCloud,
+    requests: list[httpx.Request],
+) -> None:
+    _cache_users()
+    synced = len(requests)
+    assert len(_sync_users()) == jumpcloud.tenant.users
+    counts = [r for r in requests[synced:] if r.url.params.get("limit") == "1"]
+    assert len(counts) == 1
+    assert _id_listings(requests[synced:]) == 0
+
+
+def test_stale_users_are_relisted(jumpcloud: FakeJumpCloud) -> None:
+    _cache_users()
+    user_id = object_id(USER_PREFIX, 3)
+    jumpcloud.edit_user(3, jobTitle="Chief Tester")
+    assert _job_title(user_id) == "Title 3"
+    # No watermark catches the edit, so only a full listing sees it.
+    _age(Resource.USERS, get_cache().ttl(Resource.USERS))
+    assert _job_title(user_id) == "Chief Tester"
+
+
+def test_sync_fetches_changes_since_listing_started(
+    jumpcloud: FakeJumpCloud,
+) -> None:
+    started = time.time()
+    _cache_users()
+    cache = get_cache()
+    mark = cache.watermark(Resource.USERS, "password_date")
+    assert mark is not None
+    assert cache.watermark(Resource.USERS, "created") == mark
+    changed = time.strftime(
+        "%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(started - CLOCK_SKEW + 1)
+    )
+    assert mark < changed
+    jumpcloud.edit_user(3, password_date=changed, jobTitle="Chief Tester")
+    _sync_users()
+    assert _job_title(object_id(USER_PREFIX, 3)) == "Chief Tester"
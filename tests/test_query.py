@@ -0,0 +1,140 @@
+from collections.abc import Callable
+from contextvars import copy_context
+
+import httpx
+import pytest
+
+from api import users as usr_api
+from core.cache import CacheMode, set_cache_mode
+from core.client import run
+from core.query import (
+    MAX_FILTER_LENGTH,
+    UnsupportedFilterError,
+    compile_filter,
+    in_filters,
+)
+from core.simulator import USER_PREFIX, FakeJumpCloud, object_id
+from tests.conftest import TENANT_SIZE
+
+# Each operator jam evaluates locally, on text, number-like text, boolean
+# and timestamp fields, with values that match some users but not all.
+FILTERS = [
+    "department:$eq:Sales",
+    "department:eq:Sales",
+    "costCenter:$ne:CC-007",
+    "suspended:$eq:true",
+    "suspended:$ne:true",
+    "lastname:$eq:42",
+    "lastname:$ne:42",
+    "lastname:$gt:450",
+    "lastname:$gte:450",
+    "lastname:$lt:100",
+    "lastname:$lte:100",
+    "created:$gt:2025-06-14T12:00:00.000Z",
+    "created:$gte:2025-06-14T12:00:00.000Z",
+    "created:$lt:2025-03-07T12:00:00.000Z",
+    "created:$lte:2025-03-07T12:00:00.000Z",
+    "jobTitle:$in:Title 1|Title 12|Nobody",
+    "lastname:$in:7|70|700",
+    "email:$sw:user1",
+    "email:$sw:User1",
+    "email:$ew:7@example.com",
+    "email:$sw:user_",
+    "displayname:$sw:User 1",
+]
+
+
+def _user_ids(filters: list[str] | None, mode: CacheMode) -> list[str]:
+    def listing() -> list[str]:
+        set_cache_mode(mode)
+        return [user.id for user in run(usr_api.list_users(filters))]
+
+    return copy_context().run(listing)
+
+
+def _count(requests: list[httpx.Request], test: Callable[[str], bool]) -> int:
+    return sum(
+        1
+        for request in requests
+        for name, value in request.url.params.multi_items()
+        if name.startswith("filter") and test(value)
+    )
+
+
+@pytest.fixture
+def snapshot(jumpcloud: FakeJumpCloud) -> FakeJumpCloud:
+    """The simulated JumpCloud, after a full listing has been cached."""
+    _user_ids(None, CacheMode.REBUILD)
+    return jumpcloud
+
+
+@pytest.mark.parametrize("expression", FILTERS)
+def test_local_filter_agrees_with_server(
+    snapshot: FakeJumpCloud,
+    expression: str,
+) -> None:
+    served = snapshot.requests
+    local = _user_ids([expression], CacheMode.ON)
+    assert snapshot.requests == served
+    assert local == _user_ids([expression], CacheMode.OFF)
+
+
+def test_local_filters_combine(snapshot: FakeJumpCloud) -> None:
+    filters = ["department:$eq:Sales", "created:$lt:2025-06-01"]
+    served = snapshot.requests
+    local = _user_ids(filters, CacheMode.ON)
+    assert snapshot.requests == served
+    assert local
+    assert local == _user_ids(filters, CacheMode.OFF)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "email:$regex:^user",
+        "email",
+        "mfa-status:$eq:ENROLLED",
+    ],
+)
+def test_unsupported_filter_is_left_to_server(expression: str) -> None:
+    with pytest.raises(UnsupportedFilterError):
+        compile_filter(expression)
+
+
+def test_in_filters_split_by_batch_size() -> None:
+    values = [object_id(USER_PREFIX, i) for i in range(120)]
+    filters = in_filters("_id", values, 50)
+    batches = [f.removeprefix("_id:$in:").split("|") for f in filters]
+    assert [len(batch) for batch in batches] == [50, 50, 20]
+    assert [v for batch in batches for v in batch] == values
+
+
+def test_in_filters_split_by_length() -> None:
+    values = [f"{i:03d}" + "x" * 296 for i in range(20)]
+    filters = in_filters("jobTitle", values, 100)
+    assert len(filters) > 1
+    assert all(len(f) <= MAX_FILTER_LENGTH for f in filters)
+    batches = [f.removeprefix("jobTitle:$in:").split("|") for f in filters]
+    assert [v for batch in batches for v in batch] == values
+
+
+def test_in_filters_keep_an_overlong_value() -> None:
+    value = "x" * MAX_FILTER_LENGTH
+    assert in_filters("jobTitle", [value], 100) == [f"jobTitle:$in:{value}"]
+
+
+def test_lookup_batches_ids(
+    jumpcloud: FakeJumpCloud,
+    requests: list[httpx.Request],
+) -> None:
+    ids = [object_id(USER_PREFIX, i) for i in reversed(range(150))]
+    unknown = object_id(USER_PREFIX, TENANT_SIZE)
+
+    def lookup() -> list[str]:
+        set_cache_mode(CacheMode.OFF)
+        users = run(usr_api.lookup_users([*ids, unknown, ids[0]]))
+        return [user.id for user in users]
+
+    assert copy_context().run(lookup) == ids
+    assert _count(requests, lambda f: f.startswith("_id:$in:")) == 2
+    assert jumpcloud.requests == len(requests)